@@ -0,0 +1,36 @@
+"""lookup indexes
+
+Revision ID: 218e5344703b
+Revises: a779a89f8b06
+Create Date: 2026-10-18 14:41:09.302117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '218e5344703b'
+down_revision: Union[str, Sequence[str], None] = 'a779a89f8b06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY нельзя внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_games_owner_id_id', 'games', ['owner_id', 'id'], unique=False, postgresql_include=['name'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_players_tg_id_game_id', 'players', ['tg_id', 'game_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_assignments_giver_id', 'assignments', ['giver_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_assignments_receiver_id', 'assignments', ['receiver_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_assignments_receiver_id', table_name='assignments', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_assignments_giver_id', table_name='assignments', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_players_tg_id_game_id', table_name='players', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_games_owner_id_id', table_name='games', postgresql_concurrently=True, if_exists=True)
@@ -1,15 +1,83 @@
+import logging
 from typing import Callable, Awaitable, Dict, Any
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.app.db.query_stats import QueryBudgetExceeded, current_query_stats, track_queries
 from src.app.db.session import AsyncSessionLocal
+from src.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LazySession:
+    def __init__(self, factory: async_sessionmaker[AsyncSession]) -> None:
+        self._factory = factory
+        self._session: AsyncSession | None = None
+
+    @property
+    def used(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        # сессия создаётся при первом обращении хендлера/сервиса к ней
+        if self._session is None:
+            self._session = self._factory()
+        return getattr(self._session, name)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
 
 class DbSessionMiddleware(BaseMiddleware):
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal) -> None:
+        self.session_factory = session_factory
+        self.updates_total = 0
+        self.updates_with_db = 0
+
     async def __call__(
         self,
         handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
         event: Any,
         data: Dict[str, Any],
     ) -> Any:
-        async with AsyncSessionLocal() as session:  # <- создаём сессию на один апдейт
-            data["session"] = session           # <- ключ должен называться как аргумент хендлера
+        session = LazySession(self.session_factory)  # <- коннект из пула берётся только если апдейт полез в БД
+        data["session"] = session           # <- ключ должен называться как аргумент хендлера
+        self.updates_total += 1
+        with track_queries() as stats:
+            try:
+                return await handler(event, data)
+            finally:
+                if session.used:
+                    self.updates_with_db += 1
+                await session.close()
+                if stats.queries:
+                    logger.debug("update %s: %d queries, %.1f ms", event.update_id, stats.queries, stats.seconds * 1000)
+
+
+class QueryBudgetMiddleware(BaseMiddleware):
+    # бюджет задаётся флагом хендлера: @router.callback_query(..., flags={"query_budget": 3})
+    async def __call__(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any],
+    ) -> Any:
+        budget = get_flag(data, "query_budget")
+        stats = current_query_stats.get()
+        if budget is None or stats is None:
             return await handler(event, data)
+
+        before = stats.queries
+        result = await handler(event, data)
+        used = stats.queries - before
+        if used > budget:
+            name = data["handler"].callback.__name__
+            statements = "\n".join(stats.statements[before:])
+            if settings.DB_QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(f"{name}: {used} queries, budget {budget}:\n{statements}")
+            logger.warning("%s: %d queries, budget %d:\n%s", name, used, budget, statements)
+        return result
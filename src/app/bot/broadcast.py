@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Sequence
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+
+from src.app.settings import settings
+from src.app.utils.rate_limit import TokenBucket
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class OutgoingMessage:
+    chat_id: int
+    text: str
+
+
+@dataclass(frozen=True)
+class Delivery:
+    message: OutgoingMessage
+    ok: bool
+    error: str | None = None
+    retryable: bool = False
+
+
+@dataclass(frozen=True)
+class BroadcastResult:
+    delivered: int
+    failed: int
+    deliveries: list[Delivery] = field(default_factory=list)
+
+
+class Broadcaster:
+    def __init__(
+        self,
+        bot: Bot,
+        *,
+        concurrency: int = settings.BROADCAST_CONCURRENCY,
+        # лимит телеги общий на бота, а Broadcaster свой в каждом процессе-воркере
+        rate: float = settings.BROADCAST_RATE / max(1, settings.BOT_WORKERS),
+        chat_rate: float = settings.BROADCAST_CHAT_RATE,
+        max_retries: int = settings.BROADCAST_MAX_RETRIES,
+        progress_interval: float = 2.0,
+        max_chat_buckets: int = 10_000,
+    ) -> None:
+        self.bot = bot
+        self.concurrency = concurrency
+        self.chat_rate = chat_rate
+        self.max_retries = max_retries
+        self.progress_interval = progress_interval
+        self.max_chat_buckets = max_chat_buckets
+        self._global = TokenBucket(rate)
+        self._chats: OrderedDict[int, TokenBucket] = OrderedDict()
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, capacity=1.0)
+            self._chats[chat_id] = bucket
+            if len(self._chats) > self.max_chat_buckets:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        return bucket
+
+    async def deliver(self, message: OutgoingMessage) -> Delivery:
+        attempt = 0
+        while True:
+            await self._chat_bucket(message.chat_id).acquire()
+            await self._global.acquire()
+            try:
+                await self.bot.send_message(message.chat_id, message.text, parse_mode="HTML")
+                return Delivery(message, True)
+            except TelegramRetryAfter as e:
+                # флуд-контроль у телеги общий на бота, тормозим всех
+                self._global.pause(e.retry_after)
+                error = f"retry_after={e.retry_after}"
+            except (TelegramNetworkError, TelegramServerError) as e:
+                await asyncio.sleep(min(2 ** attempt, 30))
+                error = str(e)
+            except TelegramAPIError as e:
+                return Delivery(message, False, error=str(e))
+
+            attempt += 1
+            if attempt > self.max_retries:
+                return Delivery(message, False, error=error, retryable=True)
+
+    async def send_all(
+        self,
+        messages: Sequence[OutgoingMessage],
+        on_progress: ProgressCallback | None = None,
+    ) -> BroadcastResult:
+        total = len(messages)
+        deliveries: list[Delivery | None] = [None] * total
+        done = 0
+        last_report = time.monotonic()
+        queue = iter(range(total))
+
+        async def report(force: bool = False) -> None:
+            nonlocal last_report
+            if on_progress is None:
+                return
+            now = time.monotonic()
+            if not force and now - last_report < self.progress_interval:
+                return
+            last_report = now
+            try:
+                await on_progress(done, total)
+            except TelegramAPIError:
+                pass
+
+        async def worker() -> None:
+            nonlocal done
+            for i in queue:
+                deliveries[i] = await self.deliver(messages[i])
+                done += 1
+                await report()
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, total))))
+        await report(force=True)
+
+        delivered = sum(1 for d in deliveries if d.ok)
+        return BroadcastResult(
+            delivered=delivered,
+            failed=total - delivered,
+            deliveries=list(deliveries),
+        )
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import asyncpg
+
+from src.app.db.repos.game_repo import GAME_CACHE_CHANNEL
+from src.app.services.game_service import clear_game_caches, invalidate_from_notify
+from src.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class GameCacheListener:
+    # кэши игр живут в каждом процессе; архивация из консоли и соседние воркеры сообщают об изменениях
+    # через NOTIFY, а этот слушатель держит для LISTEN своё соединение мимо пула
+    def __init__(self, *, retry_interval: float = settings.GAME_CACHE_LISTEN_RETRY) -> None:
+        self.retry_interval = retry_interval
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.listen()
+            except (OSError, asyncpg.PostgresError):
+                logger.exception("game cache listener disconnected")
+            await asyncio.sleep(self.retry_interval)
+
+    async def listen(self) -> None:
+        conn = await asyncpg.connect(
+            host=settings.DB_HOST,
+            port=settings.DB_PORT,
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+            database=settings.DB_NAME,
+        )
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _: lost.set())
+        try:
+            await conn.add_listener(GAME_CACHE_CHANNEL, self._on_notify)
+            # пока соединения не было, уведомления терялись: всё, что могло устареть, выбрасываем
+            clear_game_caches()
+            await lost.wait()
+        finally:
+            if not conn.is_closed():
+                await conn.close(timeout=5)
+
+    def _on_notify(self, conn: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            invalidate_from_notify(payload)
+        except ValueError:
+            logger.warning("bad %s payload: %r", channel, payload)
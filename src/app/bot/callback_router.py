@@ -0,0 +1,57 @@
+from typing import Any
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.dispatcher.event.handler import CallbackType
+from aiogram.dispatcher.event.telegram import TelegramEventObserver
+from aiogram.filters.callback_data import CallbackQueryFilter
+from aiogram.types import CallbackQuery
+
+SEP = "_"
+
+
+class PrefixCallbackObserver(TelegramEventObserver):
+    # все хендлеры остаются в self.handlers (по ним aiogram считает allowed_updates),
+    # а для вызова они дополнительно разложены по обычным observer'ам-корзинам по префиксу:
+    # trigger заходит только в одну корзину вместо перебора фильтров всех хендлеров
+    def __init__(self, router: Router, event_name: str) -> None:
+        super().__init__(router, event_name)
+        self.routes: dict[str, TelegramEventObserver] = {}
+        self._fallback = TelegramEventObserver(router, event_name)
+
+    def register(
+        self,
+        callback: CallbackType,
+        *filters: CallbackType,
+        flags: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> CallbackType:
+        super().register(callback, *filters, flags=flags, **kwargs)
+
+        cb_filter = next((f for f in filters if isinstance(f, CallbackQueryFilter) and f.rule is None), None)
+        if cb_filter is None:
+            bucket = self._fallback
+        else:
+            cb_type = cb_filter.callback_data
+            if cb_type.__separator__ != SEP:
+                raise ValueError(f"{cb_type.__name__} must use sep={SEP!r}")
+            bucket = self.routes.setdefault(cb_type.__prefix__, TelegramEventObserver(self.router, self.event_name))
+
+        bucket.handlers.append(self.handlers[-1])
+        return callback
+
+    async def trigger(self, event: CallbackQuery, **kwargs: Any) -> Any:
+        # корзины — стоковые observer'ы с тем же router/event_name: фильтры, мидлвари и SkipHandler как у aiogram
+        bucket = self.routes.get((event.data or "").partition(SEP)[0])
+        if bucket is not None:
+            result = await bucket.trigger(event, **kwargs)
+            if result is not UNHANDLED:
+                return result
+        return await self._fallback.trigger(event, **kwargs)
+
+
+class CallbackRouter(Router):
+    def __init__(self, *, name: str | None = None) -> None:
+        super().__init__(name=name)
+        self.callback_query = PrefixCallbackObserver(router=self, event_name="callback_query")
+        self.observers["callback_query"] = self.callback_query
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import timedelta
+from typing import Any, Mapping
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from sqlalchemy import case, cast, delete, exists, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.app.db.models import FsmState
+from src.app.db.query_stats import UNTRACKED_OPTION
+from src.app.db.session import engine as default_engine
+from src.app.settings import settings
+from src.app.utils.cache import TTLCache
+
+_table = FsmState.__table__
+
+
+class PostgresStorage(BaseStorage):
+    def __init__(
+        self,
+        engine: AsyncEngine = default_engine,
+        *,
+        ttl_seconds: int = settings.FSM_TTL_SECONDS,
+        cache_size: int = settings.FSM_CACHE_SIZE,
+        cache_ttl: float = settings.FSM_CACHE_TTL,
+        purge_interval: float = 3600.0,
+    ) -> None:
+        # тот же пул, но запросы хранилища не считаются в бюджет запросов хендлера
+        self.engine = engine.execution_options(**{UNTRACKED_OPTION: True})
+        self.ttl = timedelta(seconds=ttl_seconds)
+        # кэш только для чтения своих же записей; при нескольких репликах держать маленький TTL
+        self.cache: TTLCache[tuple[int, int, int], tuple[str | None, dict[str, Any]]] = TTLCache(
+            cache_size, cache_ttl
+        )
+        self.purge_interval = purge_interval
+        self._last_purge = time.monotonic()
+        self._purge_task: asyncio.Task | None = None
+
+    @staticmethod
+    def _key(key: StorageKey) -> tuple[int, int, int]:
+        return key.bot_id, key.chat_id, key.user_id
+
+    def _where(self, key: StorageKey):
+        return (
+            (_table.c.bot_id == key.bot_id)
+            & (_table.c.chat_id == key.chat_id)
+            & (_table.c.user_id == key.user_id)
+        )
+
+    def _values(self, key: StorageKey, **values: Any) -> dict[str, Any]:
+        return {
+            "bot_id": key.bot_id,
+            "chat_id": key.chat_id,
+            "user_id": key.user_id,
+            "expires_at": func.now() + self.ttl,
+            **values,
+        }
+
+    async def _read(self, key: StorageKey) -> tuple[str | None, dict[str, Any]]:
+        cached = self.cache.get(self._key(key))
+        if cached is not None:
+            return cached
+
+        async with self.engine.connect() as conn:
+            res = await conn.execute(
+                select(_table.c.state, _table.c.data).where(
+                    self._where(key), _table.c.expires_at > func.now()
+                )
+            )
+            row = res.first()
+
+        value = (row.state, dict(row.data)) if row else (None, {})
+        self.cache.set(self._key(key), value)
+        return value
+
+    async def _clear(self, key: StorageKey, empty, **values: Any) -> None:
+        # state.clear() = set_state(None) + set_data({}). Один запрос: запись, которая после сброса пустая
+        # (или протухла), удаляется; иначе обнуляется одно поле; пустую запись заново не вставляем
+        expired = _table.c.expires_at <= func.now()
+        deleted = delete(_table).where(self._where(key), empty | expired).returning(_table.c.user_id).cte("deleted")
+        stmt = (
+            update(_table)
+            .where(self._where(key), ~exists(select(deleted.c.user_id)))
+            .values(expires_at=func.now() + self.ttl, **values)
+            .returning(_table.c.state, _table.c.data)
+            .add_cte(deleted)
+        )
+        async with self.engine.begin() as conn:
+            row = (await conn.execute(stmt)).first()
+
+        self.cache.set(self._key(key), (row.state, dict(row.data)) if row else (None, {}))
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        if state is None:
+            await self._clear(key, _table.c.data == cast({}, JSONB), state=None)
+            return
+
+        expired = _table.c.expires_at <= func.now()
+        stmt = insert(_table).values(self._values(key, state=state, data={}))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_table.c.bot_id, _table.c.chat_id, _table.c.user_id],
+            set_={
+                "state": stmt.excluded.state,
+                "data": case((expired, stmt.excluded.data), else_=_table.c.data),
+                "expires_at": stmt.excluded.expires_at,
+            },
+        ).returning(_table.c.data)
+
+        async with self.engine.begin() as conn:
+            data = (await conn.execute(stmt)).scalar_one()
+
+        self.cache.set(self._key(key), (state, dict(data)))
+        self._maybe_purge()
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        state, _ = await self._read(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        data = dict(data)
+        if not data:
+            await self._clear(key, _table.c.state.is_(None), data={})
+            return
+
+        expired = _table.c.expires_at <= func.now()
+        stmt = insert(_table).values(self._values(key, state=None, data=data))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_table.c.bot_id, _table.c.chat_id, _table.c.user_id],
+            set_={
+                "state": case((expired, None), else_=_table.c.state),
+                "data": stmt.excluded.data,
+                "expires_at": stmt.excluded.expires_at,
+            },
+        ).returning(_table.c.state)
+
+        async with self.engine.begin() as conn:
+            state = (await conn.execute(stmt)).scalar_one()
+
+        self.cache.set(self._key(key), (state, data))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _, data = await self._read(key)
+        return dict(data)
+
+    async def update_data(self, key: StorageKey, data: Mapping[str, Any]) -> dict[str, Any]:
+        # jsonb || за один запрос вместо get_data + set_data
+        patch = dict(data)
+        expired = _table.c.expires_at <= func.now()
+        stmt = insert(_table).values(self._values(key, state=None, data=patch))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_table.c.bot_id, _table.c.chat_id, _table.c.user_id],
+            set_={
+                "state": case((expired, None), else_=_table.c.state),
+                "data": case((expired, stmt.excluded.data), else_=_table.c.data.op("||")(stmt.excluded.data)),
+                "expires_at": stmt.excluded.expires_at,
+            },
+        ).returning(_table.c.state, _table.c.data)
+
+        async with self.engine.begin() as conn:
+            row = (await conn.execute(stmt)).one()
+
+        new_data = dict(row.data)
+        self.cache.set(self._key(key), (row.state, new_data))
+        return dict(new_data)
+
+    async def purge_expired(self, batch_size: int = 1000) -> int:
+        expired = (
+            select(_table.c.bot_id, _table.c.chat_id, _table.c.user_id)
+            .where(_table.c.expires_at <= func.now())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        total = 0
+        while True:
+            async with self.engine.begin() as conn:
+                res = await conn.execute(
+                    delete(_table).where(
+                        tuple_(_table.c.bot_id, _table.c.chat_id, _table.c.user_id).in_(expired)
+                    )
+                )
+            total += res.rowcount or 0
+            if (res.rowcount or 0) < batch_size:
+                return total
+
+    def _maybe_purge(self) -> None:
+        now = time.monotonic()
+        if now - self._last_purge < self.purge_interval:
+            return
+        if self._purge_task and not self._purge_task.done():
+            return
+        self._last_purge = now
+        self._purge_task = asyncio.create_task(self.purge_expired())
+
+    async def close(self) -> None:
+        if self._purge_task is not None and not self._purge_task.done():
+            self._purge_task.cancel()
+            try:
+                await self._purge_task
+            except asyncio.CancelledError:
+                pass
+            self._purge_task = None
+        self.cache.clear()
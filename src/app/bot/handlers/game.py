@@ -1,19 +1,27 @@
-from aiogram import Router, F
+from aiogram import F
 from aiogram.filters import StateFilter, Command
+from aiogram.filters.command import CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import Message, CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.app.bot.keyboards import role_keyboard, games_list_keyboard, game_keyboard
-from src.app.bot.messages import game_created_text, game_info_text, participants_text
+from src.app.bot.callback_router import CallbackRouter
+from src.app.bot.keyboards import (
+    DrawCb, DrawLegacyCb, DropCb, GamesPageCb, LeaveCb, LockCb, MailingCb, MyReceiverCb, OpenGameCb, PlistCb, ResendCb,
+    RoleCb, UnlockCb, games_list_keyboard, mailing_keyboard, role_keyboard,
+)
+from src.app.bot.messages import game_created_text, game_info_text, participants_chunks, mailing_status_text
+from src.app.bot.outbox import OutboxWorker
+from src.app.bot.render import edit_message, game_screen_keyboard, keyboard
 from src.app.db.models import Game
 from src.app.services.assignment_service import AssignmentService
 from src.app.services.game_service import GameService
 from src.app.services.player_service import PlayerService
+from src.app.services.retention_service import RetentionService
 from src.app.utils.link import generate_link
 
-game_router = Router()
+game_router = CallbackRouter(name="game")
 
 
 class NewGame(StatesGroup):
@@ -60,27 +68,62 @@ async def check_groups(message: Message, state: FSMContext) -> None:
     await state.set_state(CheckGame.processing_role)
 
 
-@game_router.callback_query(F.data.startswith("role_"), StateFilter(CheckGame.processing_role))
-async def check_role(callback: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
-    role: str = callback.data.split("_")[1].strip()
+RESTORE_REFUSED_TEXT = {
+    "not_found": "В архиве нет игры с таким кодом 😕",
+    "not_owner": "Вернуть игру из архива может только её админ.",
+    "code_taken": "Этот код уже занят другой игрой.",
+}
+
+
+@game_router.message(Command("restore"), flags={"query_budget": 6})
+async def restore_game(message: Message, command: CommandObject, session: AsyncSession) -> None:
+    # старые игры периодически уезжают в архив (commands/retention.py); админ может вернуть свою
+    code = (command.args or "").strip()
+    if not code:
+        await message.answer("Используй /restore CODE")
+        return
+
+    res = await RetentionService(session).restore_by_code(code, owner_id=message.from_user.id)
+    if not res.ok:
+        await message.answer(RESTORE_REFUSED_TEXT[res.reason])
+        return
+    await message.answer(f"Игра «{res.game_name}» снова в /groups")
+
+
+@game_router.callback_query(RoleCb.filter(), StateFilter(CheckGame.processing_role), flags={"query_budget": 1})
+async def check_role(callback: CallbackQuery, callback_data: RoleCb, state: FSMContext, session: AsyncSession) -> None:
+    role = callback_data.role
     await state.update_data(role=role)
 
     game_serv = GameService(session)
-    games = await game_serv.get_games_by_role(callback.from_user.id, role)
+    page = await game_serv.get_games_by_role(callback.from_user.id, role)
 
-    if not games:
-        await callback.message.edit_text(
-            "Не нашёл игр по выбранной роли 😕"
-        )
+    if not page.items:
+        await edit_message(callback, "Не нашёл игр по выбранной роли 😕")
         return
 
-    await callback.message.edit_text(
-        "Выбери игру:",
-        reply_markup=games_list_keyboard(games)
-    )
+    await edit_message(callback, "Выбери игру:", keyboard(games_list_keyboard(page)))
     await state.set_state(CheckGame.processing_group)
 
 
+@game_router.callback_query(GamesPageCb.filter(), StateFilter(CheckGame.processing_group), flags={"query_budget": 1})
+async def games_page_cb(callback: CallbackQuery, callback_data: GamesPageCb, session: AsyncSession) -> None:
+    role, cursor = callback_data.role, callback_data.cursor
+
+    game_serv = GameService(session)
+    if callback_data.direction == "n":
+        page = await game_serv.get_games_by_role(callback.from_user.id, role, before_id=cursor)
+    else:
+        page = await game_serv.get_games_by_role(callback.from_user.id, role, after_id=cursor)
+
+    if not page.items:
+        await callback.answer("Больше игр нет")
+        return
+
+    if await edit_message(callback, "Выбери игру:", keyboard(games_list_keyboard(page))):
+        await callback.answer()
+
+
 async def render_game_screen(
     callback: CallbackQuery,
     session: AsyncSession,
@@ -96,16 +139,22 @@ async def render_game_screen(
         await callback.answer("Игра не найдена", show_alert=True)
         return
 
-    await callback.message.edit_text(
+    await edit_message(
+        callback,
         game_info_text(dto),
-        reply_markup=game_keyboard(dto.id, is_admin, dto.status),
+        game_screen_keyboard(dto.id, is_admin, dto.status, dto.draw_generation),
         disable_web_page_preview=True,
     )
 
 
-@game_router.callback_query(F.data.startswith("game_"), StateFilter(CheckGame.processing_group))
-async def check_game(callback: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
-    game_id = int(callback.data.split("_", 1)[1].strip())
+@game_router.callback_query(OpenGameCb.filter(), StateFilter(CheckGame.processing_group), flags={"query_budget": 1})
+async def check_game(
+    callback: CallbackQuery,
+    callback_data: OpenGameCb,
+    state: FSMContext,
+    session: AsyncSession,
+) -> None:
+    game_id = callback_data.game_id
 
     data = await state.get_data()
     is_admin = (data.get("role") == "owner")  # или "admin" — как у тебя принято
@@ -114,25 +163,25 @@ async def check_game(callback: CallbackQuery, state: FSMContext, session: AsyncS
     await state.clear()
 
 
-@game_router.callback_query(F.data.startswith("lock_"))
-async def check_game_lock(callback: CallbackQuery, session: AsyncSession) -> None:
-    game_id: int = int(callback.data.split("_")[1].strip())
+@game_router.callback_query(LockCb.filter(), flags={"query_budget": 3})
+async def check_game_lock(callback: CallbackQuery, callback_data: LockCb, session: AsyncSession) -> None:
+    game_id = callback_data.game_id
     game_serv = GameService(session)
     await game_serv.lock_game(game_id)
     await render_game_screen(callback, session, game_id=game_id, is_admin=True)
 
 
-@game_router.callback_query(F.data.startswith("unlock_"))
-async def check_game_unlock(callback: CallbackQuery, session: AsyncSession) -> None:
-    game_id: int = int(callback.data.split("_")[1].strip())
+@game_router.callback_query(UnlockCb.filter(), flags={"query_budget": 3})
+async def check_game_unlock(callback: CallbackQuery, callback_data: UnlockCb, session: AsyncSession) -> None:
+    game_id = callback_data.game_id
     game_serv = GameService(session)
     await game_serv.open_game(game_id)
     await render_game_screen(callback, session, game_id=game_id, is_admin=True)
 
 
-@game_router.callback_query(F.data.startswith("leave_"))
-async def leave_cb(callback: CallbackQuery, session: AsyncSession) -> None:
-    game_id = int(callback.data.split("_", 1)[1].strip())
+@game_router.callback_query(LeaveCb.filter(), flags={"query_budget": 4})
+async def leave_cb(callback: CallbackQuery, callback_data: LeaveCb, session: AsyncSession) -> None:
+    game_id = callback_data.game_id
 
     player_serv = PlayerService(session)
     ok = await player_serv.leave_game(game_id, callback.from_user.id)
@@ -144,9 +193,9 @@ async def leave_cb(callback: CallbackQuery, session: AsyncSession) -> None:
     await callback.message.answer("Ты вышел из группы ✅")
 
 
-@game_router.callback_query(F.data.startswith("drop_"))
-async def drop_cb(callback: CallbackQuery, session: AsyncSession) -> None:
-    game_id = int(callback.data.split("_", 1)[1].strip())
+@game_router.callback_query(DropCb.filter(), flags={"query_budget": 2})
+async def drop_cb(callback: CallbackQuery, callback_data: DropCb, session: AsyncSession) -> None:
+    game_id = callback_data.game_id
 
     serv = GameService(session)
     ok = await serv.drop_game(game_id)
@@ -158,38 +207,85 @@ async def drop_cb(callback: CallbackQuery, session: AsyncSession) -> None:
     await callback.message.answer("Группа удалена 🗑️")
 
 
-@game_router.callback_query(F.data.startswith("plist_"))
-async def plist_cb(callback: CallbackQuery, session: AsyncSession) -> None:
-    game_id = int(callback.data.split("_", 1)[1].strip())
+@game_router.callback_query(PlistCb.filter(), flags={"query_budget": 1})
+async def plist_cb(callback: CallbackQuery, callback_data: PlistCb, session: AsyncSession) -> None:
+    game_id = callback_data.game_id
 
     player_serv = PlayerService(session)
-    players = await player_serv.get_list_participants(game_id)
-
-    await callback.message.answer(participants_text(players))
+    async for chunk in participants_chunks(player_serv.stream_participants(game_id)):
+        await callback.message.answer(chunk)
     await callback.answer()
 
 
-@game_router.callback_query(F.data.startswith("draw_"))
-async def draw_cb(callback: CallbackQuery, session: AsyncSession) -> None:
-    game_id = int(callback.data.split("_", 1)[1].strip())
+@game_router.callback_query(DrawCb.filter(), flags={"query_budget": 11})
+@game_router.callback_query(DrawLegacyCb.filter(), flags={"query_budget": 11})
+async def draw_cb(
+    callback: CallbackQuery,
+    callback_data: DrawCb | DrawLegacyCb,
+    session: AsyncSession,
+    outbox_worker: OutboxWorker,
+) -> None:
+    game_id = callback_data.game_id
 
     serv = AssignmentService(session)
-    res = await serv.draw_and_notify(callback.bot, game_id)
+    res = await serv.draw_and_notify(game_id, getattr(callback_data, "generation", None))
 
     if not res.ok:
-        if res.reason == "not_enough":
+        if res.reason in ("in_progress", "already_drawn"):
+            # повторное нажатие — показываем, как идёт рассылка, вместо новой жеребьёвки
+            status = await serv.get_mailing_status(game_id)
+            await callback.message.answer(
+                mailing_status_text(status), reply_markup=mailing_keyboard(game_id, status.failed)
+            )
+            if res.reason == "in_progress":
+                await callback.answer("Распределение уже идёт, подожди пару секунд ⏳", show_alert=True)
+            else:
+                await callback.answer()
+        elif res.reason == "not_enough":
             await callback.answer("Нужно минимум 3 участника", show_alert=True)
+        elif res.reason == "infeasible":
+            await callback.answer("С такими ограничениями распределить нельзя", show_alert=True)
         else:
             await callback.answer("Не получилось разыграть", show_alert=True)
         return
 
+    outbox_worker.wake()
+    # новая клавиатура несёт новое поколение: следующее нажатие — осознанная перетасовка
+    await render_game_screen(callback, session, game_id=game_id, is_admin=True)
     await callback.message.answer("Распределение сделано 🎲")
-    await callback.message.answer(f"🎲 Готово! В личку доставлено: ✅ {res.delivered}, ❌ {res.failed}")
+    await callback.message.answer(f"📬 В очереди на отправку в личку: {res.queued}")
+
+
+@game_router.callback_query(MailingCb.filter(), flags={"query_budget": 2})
+async def mailing_cb(callback: CallbackQuery, callback_data: MailingCb, session: AsyncSession) -> None:
+    game_id = callback_data.game_id
+
+    serv = AssignmentService(session)
+    status = await serv.get_mailing_status(game_id)
+
+    await callback.message.answer(mailing_status_text(status), reply_markup=mailing_keyboard(game_id, status.failed))
+    await callback.answer()
+
+
+@game_router.callback_query(ResendCb.filter(), flags={"query_budget": 1})
+async def resend_cb(
+    callback: CallbackQuery,
+    callback_data: ResendCb,
+    session: AsyncSession,
+    outbox_worker: OutboxWorker,
+) -> None:
+    game_id = callback_data.game_id
+
+    serv = AssignmentService(session)
+    cnt = await serv.retry_failed(game_id)
+    outbox_worker.wake()
+
+    await callback.answer(f"Повторно отправляю: {cnt}", show_alert=True)
 
 
-@game_router.callback_query(F.data.startswith("my_"))
-async def my_cb(callback: CallbackQuery, session: AsyncSession) -> None:
-    game_id = int(callback.data.split("_", 1)[1].strip())
+@game_router.callback_query(MyReceiverCb.filter(), flags={"query_budget": 2})
+async def my_cb(callback: CallbackQuery, callback_data: MyReceiverCb, session: AsyncSession) -> None:
+    game_id = callback_data.game_id
 
     serv = AssignmentService(session)
     res = await serv.get_my_receiver(game_id, callback.from_user.id)
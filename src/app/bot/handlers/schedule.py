@@ -0,0 +1,99 @@
+from datetime import datetime
+from html import escape
+from zoneinfo import ZoneInfo
+
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.filters.command import CommandObject
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.bot.scheduler import Scheduler
+from src.app.services.schedule_service import JOB_KINDS, ScheduleList, ScheduleService
+from src.app.settings import settings
+
+schedule_router = Router(name="schedule")
+
+SCHEDULE_TZ = ZoneInfo(settings.SCHEDULE_TIMEZONE)
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+USAGE = (
+    "Используй:\n"
+    "/schedule CODE — что запланировано\n"
+    "/schedule CODE lock 2026-12-20 18:00 — закрыть вход\n"
+    "/schedule CODE draw 2026-12-20 19:00 — провести жеребьёвку\n"
+    "/schedule CODE remind 2026-12-25 12:00 текст — напомнить участникам\n"
+    "/schedule CODE cancel [lock|draw|remind] — отменить"
+)
+
+KIND_TITLES = {"lock": "🔒 закрытие", "draw": "🎲 жеребьёвка", "remind": "🔔 напоминание"}
+
+REFUSED_TEXT = {
+    "not_found": "Не нашёл игру по этому коду 😕",
+    "not_owner": "Расписание может менять только админ игры.",
+    "in_past": "Это время уже прошло.",
+    "no_text": "Напиши текст напоминания после времени.",
+    "already_drawn": "Жеребьёвка в этой игре уже проведена.",
+}
+
+
+def schedule_list_text(res: ScheduleList) -> str:
+    if not res.jobs:
+        return f"В игре «{escape(res.game_name)}» ничего не запланировано."
+
+    lines = [f"<b>Расписание «{escape(res.game_name)}»:</b>"]
+    for job in res.jobs:
+        # у running в run_at лежит конец аренды, а не время по расписанию
+        when = "выполняется" if job.status == "running" else job.run_at.astimezone(SCHEDULE_TZ).strftime(TIME_FORMAT)
+        line = f"{when} — {KIND_TITLES.get(job.kind, job.kind)}"
+        if job.text:
+            line += f": {escape(job.text)}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+@schedule_router.message(Command("schedule"), flags={"query_budget": 3})
+async def schedule_cmd(message: Message, command: CommandObject, session: AsyncSession, scheduler: Scheduler) -> None:
+    args = (command.args or "").split(maxsplit=4)
+    if not args:
+        await message.answer(USAGE)
+        return
+
+    serv = ScheduleService(session)
+    code, owner_id = args[0], message.from_user.id
+
+    if len(args) == 1:
+        res = await serv.list_jobs(code, owner_id)
+        await message.answer(schedule_list_text(res) if res.ok else REFUSED_TEXT[res.reason])
+        return
+
+    action = args[1].lower()
+    if action == "cancel":
+        kind = args[2].lower() if len(args) > 2 else None
+        if kind is not None and kind not in JOB_KINDS:
+            await message.answer(USAGE)
+            return
+        res = await serv.cancel_jobs(code, owner_id, kind)
+        await message.answer(f"Отменено задач: {res.count}" if res.ok else REFUSED_TEXT[res.reason])
+        return
+
+    if action not in JOB_KINDS or len(args) < 4:
+        await message.answer(USAGE)
+        return
+
+    try:
+        run_at = datetime.strptime(f"{args[2]} {args[3]}", TIME_FORMAT).replace(tzinfo=SCHEDULE_TZ)
+    except ValueError:
+        await message.answer(USAGE)
+        return
+
+    text = args[4].strip() if len(args) > 4 else None
+    res = await serv.schedule_job(code, owner_id, action, run_at, text)
+    if not res.ok:
+        await message.answer(REFUSED_TEXT[res.reason])
+        return
+
+    scheduler.notify(res.run_at)
+    await message.answer(
+        f"Запланировано: {KIND_TITLES[action]} на {args[2]} {args[3]} ({settings.SCHEDULE_TIMEZONE})"
+    )
@@ -6,10 +6,10 @@ from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import Message
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.app.bot.messages import welcome_text
+from src.app.bot.messages import join_refused_text, welcome_text
 from src.app.services.player_service import PlayerService
 
-start_router = Router()
+start_router = Router(name="start")
 
 
 class StartRegistration(StatesGroup):
@@ -46,19 +46,9 @@ async def precheck_and_ask_name(
         require_collecting=True,
     )
 
-    if chk.reason == "not_found":
+    if not chk.ok:
         await state.clear()
-        await message.answer("Не нашёл игру по этому коду 😕")
-        return
-
-    if chk.reason == "closed":
-        await state.clear()
-        await message.answer(f"В игру «{chk.game.name}» уже нельзя вступить.")
-        return
-
-    if chk.reason == "already_joined":
-        await state.clear()
-        await message.answer(f"Ты уже в игре «{chk.game.name}»\n Информация про группы: /groups")
+        await message.answer(join_refused_text(chk.reason, chk.game.name if chk.game else None))
         return
 
     await ask_name_for_join(message, state, code)
@@ -99,5 +89,10 @@ async def finish_join(message: Message, state: FSMContext, session: AsyncSession
         name=name,
         username=username
     )
+    await state.clear()
+
+    if not res.ok:
+        await message.answer(join_refused_text(res.reason, res.game_name))
+        return
 
     await message.answer(f"Ты участвуешь) Жди теперь\n Информация про группы: /groups")
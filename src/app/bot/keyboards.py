@@ -1,44 +1,125 @@
 from __future__ import annotations
 
-from aiogram.types import InlineKeyboardMarkup
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from src.app.db.models import Game
+from src.app.services.game_service import GamesPage
 
 
-def game_keyboard(game_id: int, is_admin: bool, status: str) -> InlineKeyboardMarkup:
+# формат совпадает со старыми f"lock_{id}", поэтому кнопки в уже отправленных сообщениях продолжают работать
+class RoleCb(CallbackData, prefix="role", sep="_"):
+    role: str
+
+
+class GamesPageCb(CallbackData, prefix="gpage", sep="_"):
+    role: str
+    direction: str
+    cursor: int
+
+
+class OpenGameCb(CallbackData, prefix="game", sep="_"):
+    game_id: int
+
+
+class PlistCb(CallbackData, prefix="plist", sep="_"):
+    game_id: int
+
+
+class MyReceiverCb(CallbackData, prefix="my", sep="_"):
+    game_id: int
+
+
+class LockCb(CallbackData, prefix="lock", sep="_"):
+    game_id: int
+
+
+class UnlockCb(CallbackData, prefix="unlock", sep="_"):
+    game_id: int
+
+
+class DrawCb(CallbackData, prefix="draw", sep="_"):
+    game_id: int
+    generation: int
+
+
+class DrawLegacyCb(CallbackData, prefix="draw", sep="_"):
+    # кнопки, отправленные до появления поколений: draw_{id}
+    game_id: int
+
+
+class DropCb(CallbackData, prefix="drop", sep="_"):
+    game_id: int
+
+
+class MailingCb(CallbackData, prefix="mailing", sep="_"):
+    game_id: int
+
+
+class ResendCb(CallbackData, prefix="resend", sep="_"):
+    game_id: int
+
+
+class LeaveCb(CallbackData, prefix="leave", sep="_"):
+    game_id: int
+
+
+def game_keyboard(game_id: int, is_admin: bool, status: str, generation: int = 0) -> InlineKeyboardMarkup:
     kb = InlineKeyboardBuilder()
 
-    kb.button(text="Список участников", callback_data=f"plist_{game_id}")
-    kb.button(text="Мой получатель", callback_data=f"my_{game_id}")
+    kb.button(text="Список участников", callback_data=PlistCb(game_id=game_id))
+    kb.button(text="Мой получатель", callback_data=MyReceiverCb(game_id=game_id))
 
     if is_admin:
         is_open = (status == "open")
         is_drawn = (status == "drawn")
         if is_open:
-            kb.button(text="🔒 Закрыть группу", callback_data=f"lock_{game_id}")
+            kb.button(text="🔒 Закрыть группу", callback_data=LockCb(game_id=game_id))
         else:
-            kb.button(text="🔓 Открыть группу", callback_data=f"unlock_{game_id}")
-        kb.button(text="🎲 Распределить подарки", callback_data=f"draw_{game_id}")
-        kb.button(text="Удалить группу", callback_data=f"drop_{game_id}")
+            kb.button(text="🔓 Открыть группу", callback_data=UnlockCb(game_id=game_id))
+        kb.button(text="🎲 Распределить подарки", callback_data=DrawCb(game_id=game_id, generation=generation))
+        kb.button(text="Удалить группу", callback_data=DropCb(game_id=game_id))
+        kb.button(text="📬 Статус рассылки", callback_data=MailingCb(game_id=game_id))
     else:
-        kb.button(text="Покинуть группу", callback_data=f"leave_{game_id}")
+        kb.button(text="Покинуть группу", callback_data=LeaveCb(game_id=game_id))
 
-    kb.adjust(1, 1, 2 if is_admin else 1)
+    kb.adjust(1, 1, 2, 2 if is_admin else 1)
+    return kb.as_markup()
+
+
+def mailing_keyboard(game_id: int, failed: int) -> InlineKeyboardMarkup | None:
+    if not failed:
+        return None
+    kb = InlineKeyboardBuilder()
+    kb.button(text="🔁 Повторить неотправленные", callback_data=ResendCb(game_id=game_id))
     return kb.as_markup()
 
 
 def role_keyboard() -> InlineKeyboardMarkup:
     kb = InlineKeyboardBuilder()
-    kb.button(text="Админ", callback_data=f"role_owner")
-    kb.button(text="Участник", callback_data=f"role_player")
+    kb.button(text="Админ", callback_data=RoleCb(role="owner"))
+    kb.button(text="Участник", callback_data=RoleCb(role="player"))
     kb.adjust(1)
     return kb.as_markup()
 
 
-def games_list_keyboard(games: list[Game]) -> InlineKeyboardMarkup:
+def games_list_keyboard(page: GamesPage) -> InlineKeyboardMarkup:
     kb = InlineKeyboardBuilder()
-    for game in games:
-        kb.button(text=f"🎁 {game.name}", callback_data=f"game_{game.id}")
+    for game_id, name in page.items:
+        kb.button(text=f"🎁 {name}", callback_data=OpenGameCb(game_id=game_id))
     kb.adjust(1)
+
+    nav = []
+    if page.prev_cursor is not None:
+        nav.append(InlineKeyboardButton(
+            text="◀️",
+            callback_data=GamesPageCb(role=page.role, direction="p", cursor=page.prev_cursor).pack(),
+        ))
+    if page.next_cursor is not None:
+        nav.append(InlineKeyboardButton(
+            text="▶️",
+            callback_data=GamesPageCb(role=page.role, direction="n", cursor=page.next_cursor).pack(),
+        ))
+    if nav:
+        kb.row(*nav)
     return kb.as_markup()
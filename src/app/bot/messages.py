@@ -1,9 +1,16 @@
 from __future__ import annotations
 
-from src.app.db.models import Game, Player
+from html import escape
+from typing import AsyncIterable, AsyncIterator
+
+from src.app.services.assignment_service import MailingStatus
 from src.app.services.game_service import GameInfoDTO
 
 
+MESSAGE_LIMIT = 4096
+NAME_LIMIT = 256
+
+
 def welcome_text() -> str:
     return (
         "<b>Тайный Гачи Санта</b>\n\n"
@@ -20,26 +27,64 @@ def game_created_text(code: str, deep_link: str) -> str:
     )
 
 
+def join_refused_text(reason: str, game_name: str | None) -> str:
+    if reason == "not_found":
+        return "Не нашёл игру по этому коду 😕"
+    if reason == "closed":
+        return f"В игру «{game_name}» уже нельзя вступить."
+    return f"Ты уже в игре «{game_name}»\n Информация про группы: /groups"
+
+
 def game_info_text(dto: GameInfoDTO) -> str:
     drawn = dto.status in {"shuffled"}  # подстрой под свои статусы
     status_line = "🎲 fisting проведено" if drawn else "⏳ fisting не проведено"
 
     return (
-        f"<b>{dto.name}</b>\n"
+        f"<b>{escape(dto.name)}</b>\n"
         f"Код: <code>{dto.code}</code>\n"
         f"Статус: {status_line} ({dto.status})\n"
         f"Гачистов: <b>{dto.participants}</b>\n"
-        f"Цена подарков: <b>{dto.money}</b>\n"
+        f"Цена подарков: <b>{escape(dto.money)}</b>\n"
         f"Lube: {dto.deep_link}"
     )
 
 
-def participants_text(players: list[Player]) -> str:
-    if not players:
-        return "Участников пока нет."
-
+async def participants_chunks(
+    rows: AsyncIterable[tuple[str, str]],
+    limit: int = MESSAGE_LIMIT,
+) -> AsyncIterator[str]:
+    # режем список на сообщения не длиннее лимита телеги, не держа весь список в памяти
     lines = ["<b>Участники:</b>"]
-    for i, p in enumerate(players, start=1):
-        uname = f"@{p.username}" if p.username else ""
-        lines.append(f"{i}. {p.name} {uname}".strip())
+    size = len(lines[0])
+    i = 0
+    async for name, username in rows:
+        i += 1
+        uname = f"@{escape(username)}" if username else ""
+        line = f"{i}. {escape(name[:NAME_LIMIT])} {uname}".strip()
+        if lines and size + 1 + len(line) > limit:
+            yield "\n".join(lines)
+            lines, size = [], -1
+        lines.append(line)
+        size += 1 + len(line)
+
+    if i == 0:
+        yield "Участников пока нет."
+        return
+    yield "\n".join(lines)
+
+
+def mailing_status_text(status: MailingStatus) -> str:
+    if not (status.sent or status.pending or status.failed):
+        return "Рассылки по этой игре ещё не было."
+
+    lines = [
+        "<b>Рассылка получателей:</b>",
+        f"✅ Доставлено: {status.sent}",
+        f"⏳ В очереди: {status.pending}",
+        f"❌ Не доставлено: {status.failed}",
+    ]
+    if status.failed_names:
+        lines.append("")
+        lines.append("Не получили сообщение (скорее всего не запускали бота):")
+        lines.extend(f"• {escape(name[:NAME_LIMIT])}" for name in status.failed_names)
     return "\n".join(lines)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+from aiogram import BaseMiddleware, Bot, Dispatcher, Router
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.filters import Command
+from aiogram.filters.callback_data import CallbackQueryFilter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import CallbackQuery, Message, Update
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+from src.app.bot.DBMiddleware import DbSessionMiddleware
+from src.app.bot.render import render_stats
+from src.app.db.session import get_pool_status
+from src.app.services.game_service import game_code_cache, game_info_cache, unknown_code_cache
+from src.app.utils.metrics import CONTENT_TYPE, Counter, Gauge, _Metric, registry
+
+updates_total = registry.counter("bot_updates_total", "Updates received", ["type"])
+update_errors = registry.counter("bot_update_errors_total", "Updates that raised", ["type"])
+update_seconds = registry.histogram("bot_update_seconds", "Full update processing time", ["type"])
+in_flight = registry.gauge("bot_updates_in_flight", "Updates being processed right now")
+handler_seconds = registry.histogram(
+    "bot_handler_seconds", "Handler latency", ["router", "handler", "prefix"]
+)
+api_requests = registry.counter("telegram_api_requests_total", "Bot API calls", ["method"])
+api_errors = registry.counter("telegram_api_errors_total", "Failed Bot API calls", ["method", "error"])
+api_seconds = registry.histogram("telegram_api_seconds", "Bot API call latency", ["method"])
+
+
+def _known_prefixes(routers: Iterable[Router]) -> frozenset[str]:
+    # значения лейбла prefix — только зарегистрированные команды и префиксы CallbackData:
+    # текст от пользователя в лейбл не попадает, иначе "/что-угодно" плодит серии без предела
+    known = set()
+    for router in routers:
+        for handler in router.message.handlers:
+            for f in handler.filters or ():
+                if isinstance(f.callback, Command):
+                    known.update(f"/{c}" for c in f.callback.commands if isinstance(c, str))
+        for handler in router.callback_query.handlers:
+            for f in handler.filters or ():
+                if isinstance(f.callback, CallbackQueryFilter):
+                    known.add(f.callback.callback_data.__prefix__)
+    return frozenset(known)
+
+
+def _prefix(event: Any, known: frozenset[str]) -> str:
+    if isinstance(event, CallbackQuery):
+        prefix = (event.data or "").split("_", 1)[0]
+    elif isinstance(event, Message) and event.text and event.text.startswith("/"):
+        prefix = event.text.split(maxsplit=1)[0].split("@", 1)[0]
+    else:
+        return ""
+    return prefix if prefix in known else "other"
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        kind = event.event_type
+        updates_total.inc(kind)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            update_errors.inc(kind)
+            raise
+        finally:
+            update_seconds.observe(time.perf_counter() - start, kind)
+            in_flight.dec()
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    def __init__(self, router_name: str, known_prefixes: frozenset[str]) -> None:
+        self.router_name = router_name
+        self.known_prefixes = known_prefixes
+
+    async def __call__(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_obj = data.get("handler")
+        name = getattr(getattr(handler_obj, "callback", None), "__name__", "unknown")
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            prefix = _prefix(event, self.known_prefixes)
+            handler_seconds.observe(time.perf_counter() - start, self.router_name, name, prefix)
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = method.__api_method__
+        api_requests.inc(name)
+        start = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            api_errors.inc(name, type(e).__name__)
+            raise
+        finally:
+            api_seconds.observe(time.perf_counter() - start, name)
+
+
+def _runtime_metrics(db_middleware: DbSessionMiddleware) -> Callable[[], Iterable[_Metric]]:
+    # накопительные значения — counter с _total, мгновенные — gauge
+    def collect() -> Iterable[_Metric]:
+        status = get_pool_status()
+        pool = Gauge("db_pool", "Connection pool state", ["stat"])
+        for stat in ("size", "checked_out", "overflow", "checked_in"):
+            pool.set(status[stat], stat)
+        wait_max = Gauge("db_pool_wait_seconds_max", "Longest wait for a pooled connection")
+        wait_max.set(status["wait_seconds_max"])
+        pool_events = Counter("db_pool_events_total", "Connection pool events", ["event"])
+        for event in ("checkouts", "connects", "invalidations", "timeouts"):
+            pool_events.inc(event, amount=status[event])
+        wait_total = Counter("db_pool_wait_seconds_total", "Time spent waiting for a pooled connection")
+        wait_total.inc(amount=status["wait_seconds_total"])
+
+        sessions = Counter("bot_db_session_updates_total", "Updates by DB session use", ["used"])
+        sessions.inc("yes", amount=db_middleware.updates_with_db)
+        sessions.inc("no", amount=db_middleware.updates_total - db_middleware.updates_with_db)
+
+        caches = (("game_info", game_info_cache), ("game_code", game_code_cache), ("unknown_code", unknown_code_cache))
+        cache = Counter("app_cache_requests_total", "In-process cache lookups", ["cache", "result"])
+        for name, c in caches:
+            cache.inc(name, "hit", amount=c.hits)
+            cache.inc(name, "miss", amount=c.misses)
+
+        edits = Counter("bot_message_edits_total", "Screen re-renders by outcome", ["result"])
+        edits.inc("edited", amount=render_stats.edits)
+        edits.inc("skipped", amount=render_stats.skipped)
+        edits.inc("not_modified", amount=render_stats.not_modified)
+        return pool, wait_max, pool_events, wait_total, sessions, cache, edits
+
+    return collect
+
+
+def setup_metrics(
+    dp: Dispatcher,
+    bot: Bot,
+    routers: Iterable[Router],
+    db_middleware: DbSessionMiddleware,
+) -> None:
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    routers = list(routers)
+    known = _known_prefixes(routers)
+    for router in routers:
+        router.message.middleware(HandlerMetricsMiddleware(router.name, known))
+        router.callback_query.middleware(HandlerMetricsMiddleware(router.name, known))
+    bot.session.middleware(ApiMetricsMiddleware())
+    registry.add_collector(_runtime_metrics(db_middleware))
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(body=registry.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+def add_metrics_route(app: web.Application) -> None:
+    app.router.add_get("/metrics", metrics_handler)
+
+
+def track_webhook_queue(request_handler: SimpleRequestHandler) -> None:
+    def collect() -> Iterable[Gauge]:
+        queue = Gauge("bot_webhook_background_tasks", "Webhook updates accepted but not finished")
+        queue.set(len(request_handler._background_feed_update_tasks))
+        return (queue,)
+
+    registry.add_collector(collect)
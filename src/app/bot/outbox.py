@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.app.bot.broadcast import Broadcaster, OutgoingMessage
+from src.app.db.repos.outbox_repo import OutboxRepo
+from src.app.db.session import AsyncSessionLocal
+from src.app.db.uow import UnitOfWork
+from src.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        bot: Bot,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        *,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        lease_seconds: float = settings.OUTBOX_LEASE_SECONDS,
+        max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+        idle_interval: float = settings.OUTBOX_IDLE_INTERVAL,
+    ) -> None:
+        self.broadcaster = Broadcaster(bot)
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.idle_interval = idle_interval
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run(self) -> None:
+        while True:
+            try:
+                if await self.drain_once():
+                    continue
+            except Exception:
+                logger.exception("outbox drain failed")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.idle_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def drain_once(self) -> int:
+        async with self.session_factory() as session, UnitOfWork(session):
+            rows = await OutboxRepo(session).claim_batch(self.batch_size, self.lease_seconds)
+        if not rows:
+            return 0
+
+        res = await self.broadcaster.send_all([OutgoingMessage(r.chat_id, r.body) for r in rows])
+
+        now = datetime.now(timezone.utc)
+        sent_ids: list[int] = []
+        failures: list[tuple[int, str, datetime | None]] = []
+        for row, delivery in zip(rows, res.deliveries):
+            if delivery.ok:
+                sent_ids.append(row.id)
+                continue
+            retry_at = None
+            if delivery.retryable and row.attempts < self.max_attempts:
+                retry_at = now + timedelta(seconds=min(10 * 2 ** row.attempts, 900))
+            failures.append((row.id, delivery.error or "unknown", retry_at))
+
+        async with self.session_factory() as session, UnitOfWork(session):
+            await OutboxRepo(session).save_results(sent_ids, failures)
+
+        return len(rows)
@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup
+
+from src.app.bot.keyboards import game_keyboard
+from src.app.settings import settings
+from src.app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class Keyboard:
+    markup: InlineKeyboardMarkup | None
+    digest: str
+
+
+class RenderStats:
+    def __init__(self) -> None:
+        self.edits = 0
+        self.skipped = 0
+        self.not_modified = 0
+
+
+render_stats = RenderStats()
+
+# (chat_id, message_id) -> хэш того, что сейчас показано в сообщении
+_shown: TTLCache[tuple[int, int], int] = TTLCache(settings.RENDER_CACHE_SIZE, settings.RENDER_CACHE_TTL)
+
+
+def keyboard(markup: InlineKeyboardMarkup | None) -> Keyboard:
+    return Keyboard(markup=markup, digest=markup.model_dump_json() if markup else "")
+
+
+@lru_cache(maxsize=settings.RENDER_KEYBOARD_CACHE_SIZE)
+def game_screen_keyboard(game_id: int, is_admin: bool, status: str, generation: int) -> Keyboard:
+    return keyboard(game_keyboard(game_id, is_admin, status, generation))
+
+
+async def edit_message(callback: CallbackQuery, text: str, kb: Keyboard = keyboard(None), **kwargs: Any) -> bool:
+    # одинаковый текст+клавиатура — не трогаем Telegram, только гасим "часики" на кнопке
+    message = callback.message
+    key = (message.chat.id, message.message_id)
+    digest = hash((text, kb.digest))
+    if _shown.get(key) == digest:
+        render_stats.skipped += 1
+        await callback.answer()
+        return False
+
+    try:
+        await message.edit_text(text, reply_markup=kb.markup, **kwargs)
+    except TelegramBadRequest as e:
+        if "message is not modified" not in e.message:
+            raise
+        render_stats.not_modified += 1
+        await callback.answer()
+        _shown.set(key, digest)
+        return False
+
+    render_stats.edits += 1
+    _shown.set(key, digest)
+    return True
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+from html import escape
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.app.bot.outbox import OutboxWorker
+from src.app.db.models import ScheduledJob
+from src.app.db.repos.game_repo import GameRepo
+from src.app.db.repos.outbox_repo import OutboxRepo
+from src.app.db.repos.player_repo import PlayerRepo
+from src.app.db.repos.schedule_repo import ScheduleRepo
+from src.app.db.session import AsyncSessionLocal
+from src.app.db.uow import UnitOfWork
+from src.app.services.assignment_service import AssignmentService
+from src.app.services.game_service import invalidate_game_info
+from src.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS_RETRY_SECONDS = 30.0
+
+DRAW_FAILED_TEXT = {
+    "not_enough": "слишком мало участников (нужно хотя бы 3)",
+    "infeasible": "не получилось составить пары",
+}
+
+
+class Scheduler:
+    # задачи лежат в postgres; в памяти только куча ближайших run_at, чтобы спать ровно до следующей
+    def __init__(
+        self,
+        outbox_worker: OutboxWorker,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        *,
+        batch_size: int = settings.SCHEDULER_BATCH_SIZE,
+        lease_seconds: float = settings.SCHEDULER_LEASE_SECONDS,
+        max_attempts: int = settings.SCHEDULER_MAX_ATTEMPTS,
+        idle_interval: float = settings.SCHEDULER_IDLE_INTERVAL,
+        prefetch: int = settings.SCHEDULER_PREFETCH,
+    ) -> None:
+        self.outbox_worker = outbox_worker
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.idle_interval = idle_interval
+        self.prefetch = prefetch
+        self._timers: list[datetime] = []
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def notify(self, run_at: datetime) -> None:
+        # новая задача этой реплики; будим цикл, только если она раньше текущего таймера
+        if not self._timers or run_at < self._timers[0]:
+            self._wakeup.set()
+        heapq.heappush(self._timers, run_at)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run(self) -> None:
+        while True:
+            try:
+                while await self.run_once():
+                    pass
+                await self.refill()
+            except Exception:
+                logger.exception("scheduler tick failed")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._sleep_seconds())
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _sleep_seconds(self) -> float:
+        # idle_interval ограничивает сон сверху: так подхватываются задачи, добавленные другими репликами
+        now = datetime.now(timezone.utc)
+        while self._timers and self._timers[0] <= now:
+            heapq.heappop(self._timers)
+        if not self._timers:
+            return self.idle_interval
+        return min(self.idle_interval, (self._timers[0] - now).total_seconds())
+
+    async def refill(self) -> None:
+        async with self.session_factory() as session:
+            times = await ScheduleRepo(session).next_run_times(self.prefetch)
+        self._timers = times
+        heapq.heapify(self._timers)
+
+    async def run_once(self) -> int:
+        # FOR UPDATE SKIP LOCKED + аренда: одну задачу забирает ровно одна реплика
+        async with self.session_factory() as session, UnitOfWork(session):
+            jobs = await ScheduleRepo(session).claim_due(self.batch_size, self.lease_seconds)
+
+        for job in jobs:
+            await self.execute(job)
+        return len(jobs)
+
+    async def execute(self, job: ScheduledJob) -> None:
+        handlers = {"lock": self._run_lock, "draw": self._run_draw, "remind": self._run_remind}
+        try:
+            handler = handlers.get(job.kind)
+            if handler is None:
+                raise ValueError(f"unknown job kind: {job.kind}")
+            await handler(job)
+        except Exception as e:
+            logger.exception("scheduled job %s (%s) failed", job.id, job.kind)
+            await self._fail(job, repr(e))
+
+    async def _fail(self, job: ScheduledJob, error: str) -> None:
+        async with self.session_factory() as session, UnitOfWork(session):
+            repo = ScheduleRepo(session)
+            if job.attempts >= self.max_attempts:
+                await repo.finish_job(job.id, error=error[:500])
+            else:
+                retry_at = datetime.now(timezone.utc) + timedelta(seconds=min(10 * 2 ** job.attempts, 900))
+                await repo.retry_job(job.id, retry_at, error)
+
+    async def _run_lock(self, job: ScheduledJob) -> None:
+        async with self.session_factory() as session, UnitOfWork(session) as uow:
+            # закрываем только открытую игру: после жеребьёвки статус не трогаем
+            repo = GameRepo(session)
+            code = await repo.set_game_status(job.game_id, "locked", expected="open")
+            await ScheduleRepo(session).finish_job(job.id)
+            if code is not None:
+                await repo.notify_games_changed([(job.game_id, code)])
+                uow.after_commit(lambda: invalidate_game_info(job.game_id, code))
+
+    async def _run_draw(self, job: ScheduledJob) -> None:
+        async with self.session_factory() as session:
+            # жеребьёвка и отметка задачи — разные транзакции; если упадём между ними,
+            # повтор задачи увидит сменившееся поколение и получит already_drawn, а не вторую рассылку
+            res = await AssignmentService(session).draw_and_notify(job.game_id, job.payload.get("generation"))
+
+            if res.reason == "in_progress":
+                # админ как раз жмёт кнопку — пробуем чуть позже, не тратя попытку
+                async with UnitOfWork(session):
+                    retry_at = datetime.now(timezone.utc) + timedelta(seconds=IN_PROGRESS_RETRY_SECONDS)
+                    await ScheduleRepo(session).postpone_job(job.id, retry_at)
+                return
+
+            async with UnitOfWork(session):
+                repo = ScheduleRepo(session)
+                if res.ok or res.reason in ("already_drawn", "not_found"):
+                    await repo.finish_job(job.id)
+                else:
+                    await repo.finish_job(job.id, error=res.reason)
+                    game = await GameRepo(session).get_game_by_id(job.game_id)
+                    if game is not None:
+                        text = (
+                            f"Жеребьёвка по расписанию в игре «{escape(game.name)}» не состоялась: "
+                            f"{DRAW_FAILED_TEXT.get(res.reason, res.reason)}."
+                        )
+                        await OutboxRepo(session).add_messages(game.id, [(game.owner_id, text)], kind="notice")
+
+        self.outbox_worker.wake()
+
+    async def _run_remind(self, job: ScheduledJob) -> None:
+        async with self.session_factory() as session, UnitOfWork(session) as uow:
+            game = await GameRepo(session).get_game_by_id(job.game_id)
+            if game is not None:
+                text = f"🎅 <b>{escape(game.name)}</b>\n{escape(job.payload.get('text') or '')}"
+                players = await PlayerRepo(session).list_participants(job.game_id)
+                await OutboxRepo(session).add_messages(game.id, [(p.tg_id, text) for p in players], kind="remind")
+            await ScheduleRepo(session).finish_job(job.id)
+            uow.after_commit(self.outbox_worker.wake)
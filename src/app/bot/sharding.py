@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from functools import partial
+from multiprocessing.queues import Queue
+from typing import Any, Sequence
+
+from aiogram import Bot, Dispatcher
+from aiohttp import ClientError, ClientSession, ClientTimeout, web
+
+from src.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# в апдейте кроме update_id ровно одно поле с событием; автор события лежит под одним из этих ключей
+_ACTOR_FIELDS = ("from", "user", "chat")
+
+
+def update_shard_key(update: dict[str, Any]) -> int:
+    # без pydantic: фронт только смотрит в сырой json и не тратит CPU на разбор апдейта
+    for field, event in update.items():
+        if field == "update_id" or not isinstance(event, dict):
+            continue
+        for actor in _ACTOR_FIELDS:
+            obj = event.get(actor)
+            if isinstance(obj, dict) and "id" in obj:
+                return int(obj["id"])
+    return int(update.get("update_id", 0))
+
+
+class UpdateSharder:
+    # фронт: один пользователь всегда попадает в один воркер — FSM, троттлинг и порядок апдейтов не разъезжаются
+    def __init__(self, queues: Sequence[Queue]) -> None:
+        self.queues = list(queues)
+
+    def dispatch(self, update: dict[str, Any]) -> None:
+        key = update_shard_key(update)
+        self.queues[key % len(self.queues)].put((key, update))
+
+    def close(self) -> None:
+        for queue in self.queues:
+            queue.put(None)
+
+
+async def poll_raw_updates(bot: Bot, sharder: UpdateSharder, allowed_updates: list[str], timeout: int = 30) -> None:
+    # getUpdates напрямую: апдейты уходят в воркеры сырыми dict, разбирает их уже воркер
+    url = bot.session.api.api_url(token=bot.token, method="getUpdates")
+    offset: int | None = None
+    async with ClientSession(timeout=ClientTimeout(total=timeout + 10)) as http:
+        while True:
+            payload: dict[str, Any] = {"timeout": timeout, "allowed_updates": allowed_updates}
+            if offset is not None:
+                payload["offset"] = offset
+            try:
+                async with http.post(url, json=payload) as resp:
+                    body = await resp.json()
+            except (ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.warning("getUpdates failed: %r", e)
+                await asyncio.sleep(1.0)
+                continue
+
+            if not body.get("ok"):
+                logger.warning("getUpdates error: %s", body.get("description"))
+                await asyncio.sleep(float(body.get("parameters", {}).get("retry_after", 1.0)))
+                continue
+
+            for update in body["result"]:
+                sharder.dispatch(update)
+                offset = update["update_id"] + 1
+
+
+def raw_webhook_handler(sharder: UpdateSharder, secret_token: str = ""):
+    async def handle(request: web.Request) -> web.Response:
+        if secret_token and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret_token:
+            return web.Response(status=401)
+        sharder.dispatch(await request.json())
+        return web.Response()
+
+    return handle
+
+
+class ShardWorker:
+    # воркер: разные пользователи обрабатываются параллельно, апдейты одного пользователя — строго по очереди
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        queue: Queue,
+        *,
+        concurrency: int = settings.BOT_WORKER_CONCURRENCY,
+    ) -> None:
+        self.dp = dp
+        self.bot = bot
+        self.queue = queue
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tails: dict[int, asyncio.Task] = {}
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await loop.run_in_executor(None, self.queue.get)
+            if item is None:
+                break
+
+            key, update = item
+            task = asyncio.create_task(self._handle(self._tails.get(key), update))
+            self._tails[key] = task
+            task.add_done_callback(partial(self._forget, key))
+
+        await asyncio.gather(*self._tails.values(), return_exceptions=True)
+
+    async def _handle(self, previous: asyncio.Task | None, update: dict[str, Any]) -> None:
+        # слот берём только когда подошла очередь этого пользователя: иначе пачка апдейтов
+        # от одного пользователя заняла бы все слоты ожиданием и встали бы остальные
+        if previous is not None:
+            await asyncio.wait([previous])
+        async with self._slots:
+            try:
+                await self.dp.feed_raw_update(self.bot, update)
+            except Exception:
+                logger.exception("update %s failed", update.get("update_id"))
+
+    def _forget(self, key: int, task: asyncio.Task) -> None:
+        if self._tails.get(key) is task:
+            del self._tails[key]
@@ -0,0 +1,94 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import Update, User
+
+from src.app.settings import settings
+from src.app.utils.cache import TTLCache
+from src.app.utils.rate_limit import TokenBucket
+
+# префикс callback_data -> (токенов в секунду, размер пачки)
+ACTION_LIMITS: dict[str, tuple[float, float]] = {
+    "draw": (1 / 30, 1),
+    "resend": (1 / 30, 1),
+    "plist": (1 / 5, 2),
+    "lock": (1 / 2, 2),
+    "unlock": (1 / 2, 2),
+    "drop": (1 / 5, 1),
+    "leave": (1 / 5, 1),
+}
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    def __init__(
+        self,
+        rate: float = settings.THROTTLE_RATE,
+        burst: float = settings.THROTTLE_BURST,
+        debounce: float = settings.THROTTLE_DEBOUNCE,
+        maxsize: int = settings.THROTTLE_CACHE_SIZE,
+        action_limits: dict[str, tuple[float, float]] = ACTION_LIMITS,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.action_limits = action_limits
+        self.throttled = 0
+        self.debounced = 0
+
+        # ведро, не трогавшееся дольше времени полного пополнения, ничем не отличается от нового,
+        # поэтому его можно спокойно выкинуть — память ограничена maxsize
+        refill = max([burst / rate] + [b / r for r, b in action_limits.values()])
+        self._users: TTLCache[int, TokenBucket] = TTLCache(maxsize, refill)
+        self._actions: TTLCache[tuple[int, str], TokenBucket] = TTLCache(maxsize, refill)
+        self._recent: TTLCache[tuple[int, str], bool] = TTLCache(maxsize, debounce)
+
+    @staticmethod
+    def _take(cache: TTLCache, key: Any, rate: float, burst: float) -> bool:
+        bucket = cache.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, burst)
+        cache.set(key, bucket)
+        return bucket.try_acquire()
+
+    async def __call__(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        callback = event.callback_query
+        if callback is not None and callback.data:
+            key = (user.id, callback.data)
+            if self._recent.get(key):
+                # двойной тап по той же кнопке
+                self.debounced += 1
+                await self._answer(data["bot"], callback.id)
+                return None
+            self._recent.set(key, True)
+
+        if not self._take(self._users, user.id, self.rate, self.burst):
+            return await self._reject(data["bot"], callback)
+
+        if callback is not None and callback.data:
+            action = callback.data.partition("_")[0]
+            limit = self.action_limits.get(action)
+            if limit and not self._take(self._actions, (user.id, action), *limit):
+                return await self._reject(data["bot"], callback, "Слишком часто, подожди немного ⏳")
+
+        return await handler(event, data)
+
+    async def _reject(self, bot: Bot, callback: Any, text: str | None = None) -> None:
+        self.throttled += 1
+        if callback is not None:
+            await self._answer(bot, callback.id, text)
+
+    @staticmethod
+    async def _answer(bot: Bot, callback_id: str, text: str | None = None) -> None:
+        try:
+            await bot.answer_callback_query(callback_id, text=text)
+        except TelegramAPIError:
+            pass
@@ -0,0 +1,71 @@
+import asyncio
+import sys
+import time
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.db.models import Assignment, Game, Player
+from src.app.db.repos.assignment_repo import AssignmentRepo
+from src.app.db.session import AsyncSessionLocal
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+async def _setup(size: int) -> tuple[int, list[tuple[int, int]]]:
+    async with AsyncSessionLocal() as session:
+        game_id = (await session.execute(
+            insert(Game)
+            .values(name="bench", money="0", code=f"BENCH{size}", status="open", owner_id=0)
+            .returning(Game.id)
+        )).scalar_one()
+        await session.execute(
+            insert(Player),
+            [{"game_id": game_id, "tg_id": i, "name": "p", "username": ""} for i in range(size)],
+        )
+        ids = list((await session.execute(select(Player.id).where(Player.game_id == game_id))).scalars())
+        await session.commit()
+    return game_id, [(ids[i], ids[(i + 1) % size]) for i in range(size)]
+
+
+async def _orm(session: AsyncSession, game_id: int, pairs: list[tuple[int, int]]) -> None:
+    # как было раньше: объект на каждую пару + add_all
+    session.add_all([Assignment(game_id=game_id, giver_id=g, receiver_id=r) for g, r in pairs])
+    await session.flush()
+
+
+async def _insert(session: AsyncSession, game_id: int, pairs: list[tuple[int, int]]) -> None:
+    await AssignmentRepo(session)._insert_rows([(game_id, g, r) for g, r in pairs])
+
+
+async def _copy(session: AsyncSession, game_id: int, pairs: list[tuple[int, int]]) -> None:
+    await AssignmentRepo(session)._copy_rows([(game_id, g, r) for g, r in pairs])
+
+
+async def _measure(write, game_id: int, pairs: list[tuple[int, int]]) -> float:
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(Assignment).where(Assignment.game_id == game_id))
+        await session.commit()
+
+        start = time.perf_counter()
+        await write(session, game_id, pairs)
+        await session.commit()
+        return len(pairs) / (time.perf_counter() - start)
+
+
+async def main() -> int:
+    print(f"{'pairs':>8} {'orm add_all':>14} {'multi-row insert':>18} {'copy':>14}   rows/s")
+    for size in SIZES:
+        game_id, pairs = await _setup(size)
+        try:
+            rates = [await _measure(write, game_id, pairs) for write in (_orm, _insert, _copy)]
+            print(f"{size:>8} {rates[0]:>14,.0f} {rates[1]:>18,.0f} {rates[2]:>14,.0f}")
+        finally:
+            async with AsyncSessionLocal() as session:
+                await session.execute(delete(Game).where(Game.id == game_id))
+                await session.commit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,85 @@
+import asyncio
+import sys
+import time
+
+from aiogram import F, Router
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery, User
+
+from src.app.bot.callback_router import CallbackRouter
+from src.app.bot.keyboards import (
+    DrawCb, DropCb, GamesPageCb, LeaveCb, LockCb, MailingCb, MyReceiverCb, OpenGameCb, PlistCb, ResendCb, RoleCb,
+    UnlockCb,
+)
+
+ROUNDS = 2_000
+
+# в том же порядке, в каком хендлеры зарегистрированы в game_router
+CALLBACKS: list[tuple[type[CallbackData], str]] = [
+    (RoleCb, "role_owner"),
+    (GamesPageCb, "gpage_owner_n_100"),
+    (OpenGameCb, "game_42"),
+    (LockCb, "lock_42"),
+    (UnlockCb, "unlock_42"),
+    (LeaveCb, "leave_42"),
+    (DropCb, "drop_42"),
+    (PlistCb, "plist_42"),
+    (DrawCb, "draw_42_0"),
+    (MailingCb, "mailing_42"),
+    (ResendCb, "resend_42"),
+    (MyReceiverCb, "my_42"),
+]
+
+
+def _legacy_router() -> Router:
+    # как было: startswith-фильтр на каждый хендлер и ручной split внутри
+    router = Router()
+    for cb_type, _ in CALLBACKS:
+        async def handler(callback: CallbackQuery) -> int:
+            return len(callback.data.split("_"))
+
+        router.callback_query.register(handler, F.data.startswith(f"{cb_type.__prefix__}_"))
+    return router
+
+
+def _prefix_router() -> CallbackRouter:
+    router = CallbackRouter()
+    for cb_type, _ in CALLBACKS:
+        async def handler(callback: CallbackQuery, callback_data: CallbackData) -> bool:
+            return callback_data.__prefix__ is not None
+
+        router.callback_query.register(handler, cb_type.filter())
+    return router
+
+
+def _event(data: str) -> CallbackQuery:
+    user = User(id=1, is_bot=False, first_name="bench")
+    return CallbackQuery(id="1", from_user=user, chat_instance="bench", data=data)
+
+
+async def _measure(router: Router, data: str) -> float:
+    observer = router.callback_query
+    event = _event(data)
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await observer.trigger(event)
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+async def main() -> int:
+    legacy, prefix = _legacy_router(), _prefix_router()
+    print(f"{'callback':>18} {'startswith chain':>18} {'prefix table':>14}   µs/callback")
+    totals = [0.0, 0.0]
+    for _, data in CALLBACKS:
+        before = await _measure(legacy, data)
+        after = await _measure(prefix, data)
+        totals[0] += before
+        totals[1] += after
+        print(f"{data:>18} {before:>18.2f} {after:>14.2f}")
+    n = len(CALLBACKS)
+    print(f"{'average':>18} {totals[0] / n:>18.2f} {totals[1] / n:>14.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
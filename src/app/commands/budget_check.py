@@ -0,0 +1,174 @@
+import asyncio
+import sys
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot, Dispatcher, Router
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.enums import ParseMode
+from aiogram.types import Chat, Message, Update
+
+from src.app.bot.handlers.game import game_router
+from src.app.bot.handlers.schedule import schedule_router
+from src.app.bot.handlers.start import start_router
+from src.app.db.query_stats import QueryBudgetExceeded, assert_max_queries
+from src.app.db.session import AsyncSessionLocal
+from src.app.main import create_dispatcher
+from src.app.services.game_service import GameService
+from src.app.services.player_service import PlayerService
+from src.app.settings import settings
+
+# tg_id тестовых пользователей: далеко за пределами настоящих id
+OWNER = 9_000_000_001
+PLAYERS = (9_000_000_002, 9_000_000_003, 9_000_000_004)
+
+ROUTERS = (game_router, start_router, schedule_router)
+
+
+class OfflineSession(BaseSession):
+    # ответы Bot API хендлерам не важны: проверяются только запросы к БД
+    async def make_request(self, bot: Bot, method: Any, timeout: int | None = None) -> Any:
+        if method.__returning__ is Message:
+            return Message(message_id=1, date=datetime.now(timezone.utc), chat=Chat(id=OWNER, type="private"))
+        return True
+
+    async def stream_content(self, *args: Any, **kwargs: Any) -> Any:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class HandlerRecorder(BaseMiddleware):
+    # какой хендлер реально сработал: без этого не сматчившийся апдейт прошёл бы проверку с нулём запросов
+    def __init__(self) -> None:
+        self.called: list[str] = []
+
+    async def __call__(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any],
+    ) -> Any:
+        self.called.append(data["handler"].callback.__name__)
+        return await handler(event, data)
+
+
+def _budgets(routers: tuple[Router, ...]) -> dict[str, int]:
+    budgets = {}
+    for router in routers:
+        for observer in (router.message, router.callback_query):
+            for handler in observer.handlers:
+                if "query_budget" in handler.flags:
+                    budgets[handler.callback.__name__] = handler.flags["query_budget"]
+    return budgets
+
+
+def _message(update_id: int, user_id: int, text: str) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "check"},
+            "text": text,
+        },
+    })
+
+
+def _callback(update_id: int, user_id: int, data: str) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "chat_instance": "budget_check",
+            "data": data,
+            "from": {"id": user_id, "is_bot": False, "first_name": "check"},
+            "message": {"message_id": 1, "date": 0, "chat": {"id": user_id, "type": "private"}, "text": "-"},
+        },
+    })
+
+
+def _cases(game_id: int, code: str) -> list[tuple[str | None, int, Callable[[int, int], Update]]]:
+    # (ожидаемый хендлер или None для подготовительного апдейта, пользователь, апдейт) — в порядке сценария
+    def msg(text: str) -> Callable[[int, int], Update]:
+        return lambda n, user: _message(n, user, text)
+
+    def cb(data: str) -> Callable[[int, int], Update]:
+        return lambda n, user: _callback(n, user, data)
+
+    return [
+        (None, OWNER, msg("/groups")),
+        ("check_role", OWNER, cb("role_owner")),
+        ("check_game", OWNER, cb(f"game_{game_id}")),
+        ("check_game_lock", OWNER, cb(f"lock_{game_id}")),
+        ("check_game_unlock", OWNER, cb(f"unlock_{game_id}")),
+        ("plist_cb", OWNER, cb(f"plist_{game_id}")),
+        ("schedule_cmd", OWNER, msg(f"/schedule {code}")),
+        ("draw_cb", OWNER, cb(f"draw_{game_id}_0")),
+        ("draw_cb", OWNER, cb(f"draw_{game_id}")),
+        ("mailing_cb", OWNER, cb(f"mailing_{game_id}")),
+        ("resend_cb", OWNER, cb(f"resend_{game_id}")),
+        ("my_cb", PLAYERS[0], cb(f"my_{game_id}")),
+        ("leave_cb", PLAYERS[2], cb(f"leave_{game_id}")),
+        ("drop_cb", OWNER, cb(f"drop_{game_id}")),
+    ]
+
+
+async def _run(dp: Dispatcher, bot: Bot, recorder: HandlerRecorder, game_id: int, code: str) -> int:
+    budgets = _budgets(ROUTERS)
+    failed = 0
+    for n, (expected, user_id, make) in enumerate(_cases(game_id, code), start=1):
+        update = make(n, user_id)
+        if expected is None:
+            await dp.feed_update(bot, update)
+            continue
+
+        recorder.called.clear()
+        budget = budgets[expected]
+        try:
+            async with assert_max_queries(budget) as stats:
+                await dp.feed_update(bot, update)
+        except QueryBudgetExceeded as e:
+            failed += 1
+            print(f"FAIL {expected}: {e}")
+            continue
+
+        if expected not in recorder.called:
+            failed += 1
+            print(f"FAIL {expected}: not reached (called: {', '.join(recorder.called) or 'nothing'})")
+        else:
+            print(f"OK   {expected}: {stats.queries}/{budget} queries, {stats.seconds * 1000:.1f} ms")
+    return failed
+
+
+async def main() -> int:
+    # бюджет проверяет assert_max_queries вокруг апдейта; мидлварь пусть только пишет warning
+    settings.DB_QUERY_BUDGET_STRICT = False
+    bot = Bot(token=settings.TOKEN, session=OfflineSession(), default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    dp = create_dispatcher(bot, throttling=False)
+    recorder = HandlerRecorder()
+    for router in ROUTERS:
+        router.message.middleware(recorder)
+        router.callback_query.middleware(recorder)
+
+    async with AsyncSessionLocal() as session:
+        game = await GameService(session).create_game("budget check", "0", OWNER)
+        for user_id in (OWNER, *PLAYERS):
+            await PlayerService(session).join_game_by_code(game.code, user_id, f"check {user_id}")
+        game_id, code = game.id, game.code
+
+    try:
+        failed = await _run(dp, bot, recorder, game_id, code)
+    finally:
+        # drop_cb удаляет игру сам; если сценарий оборвался раньше — убираем за собой
+        async with AsyncSessionLocal() as session:
+            await GameService(session).drop_game(game_id)
+        await bot.session.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
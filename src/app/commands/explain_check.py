@@ -0,0 +1,106 @@
+import asyncio
+import json
+import re
+import sys
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.db.repos.assignment_repo import AssignmentRepo
+from src.app.db.repos.game_repo import GameRepo
+from src.app.db.repos.player_repo import PlayerRepo
+from src.app.db.session import AsyncSessionLocal, engine
+
+# таблицы, по которым горячие запросы не должны уходить в seq scan
+CHECKED_TABLES = {"games", "players", "assignments"}
+
+CHECKS: list[tuple[str, Callable[[AsyncSession], Awaitable[Any]]]] = [
+    ("GameRepo.get_game_by_code", lambda s: GameRepo(s).get_game_by_code("AAAAAAAA")),
+    ("GameRepo.get_game_by_id", lambda s: GameRepo(s).get_game_by_id(0)),
+    ("GameRepo.list_games_by_admin", lambda s: GameRepo(s).list_games_by_admin(0)),
+    ("GameRepo.list_games_by_player", lambda s: GameRepo(s).list_games_by_player(0)),
+    ("GameRepo.count_participants", lambda s: GameRepo(s).count_participants(0)),
+    ("PlayerRepo.list_participants", lambda s: PlayerRepo(s).list_participants(0)),
+    ("PlayerRepo.get_player_by_tg", lambda s: PlayerRepo(s).get_player_by_tg(0, 0)),
+    ("AssignmentRepo.get_receiver_player", lambda s: AssignmentRepo(s).get_receiver_player(0, 0)),
+]
+
+
+def _scan_nodes(plan: dict) -> list[dict]:
+    nodes = [plan]
+    for child in plan.get("Plans", []):
+        nodes.extend(_scan_nodes(child))
+    return nodes
+
+
+def _is_full_scan(node: dict, leading: dict[str, str]) -> bool:
+    if node["Node Type"] == "Seq Scan":
+        return True
+    cond = node.get("Index Cond")
+    if cond is None:
+        # без Index Cond, но и без Filter — внутренняя сторона nested loop на крошечной таблице
+        return "Filter" in node
+    # условие не по первой колонке индекса — это проход по всему индексу
+    return re.search(rf"\b{leading[node['Index Name']]}\b", cond) is None
+
+
+async def _leading_columns(session: AsyncSession) -> dict[str, str]:
+    res = await session.execute(text(
+        "SELECT c.relname, a.attname FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]"
+    ))
+    return {index: column for index, column in res.all()}
+
+
+async def _explain(session: AsyncSession, call: Callable[[AsyncSession], Awaitable[Any]]) -> list[dict]:
+    captured: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        await call(session)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    conn = await session.connection()
+    plans = []
+    for statement, parameters in captured:
+        res = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        raw = res.scalar_one()
+        plans.append((json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"])
+    return plans
+
+
+async def main() -> int:
+    failed = 0
+    async with AsyncSessionLocal() as session:
+        # без seq scan и hash/merge join планировщик берёт индекс, если он вообще подходит —
+        # даже на пустых таблицах, где иначе статистика ничего не скажет
+        for setting in ("enable_seqscan", "enable_hashjoin", "enable_mergejoin"):
+            await session.execute(text(f"SET LOCAL {setting} = off"))
+
+        leading = await _leading_columns(session)
+
+        for name, call in CHECKS:
+            nodes = [
+                n for plan in await _explain(session, call) for n in _scan_nodes(plan)
+                if n.get("Relation Name") in CHECKED_TABLES
+            ]
+            bad = [n["Relation Name"] for n in nodes if _is_full_scan(n, leading)]
+            used = ", ".join(f"{n['Node Type']} {n.get('Index Name') or n['Relation Name']}" for n in nodes)
+            if bad:
+                failed += 1
+                print(f"FAIL {name}: full scan on {', '.join(bad)} ({used})")
+            else:
+                print(f"OK   {name}: {used}")
+
+        await session.rollback()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
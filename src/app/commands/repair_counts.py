@@ -0,0 +1,26 @@
+import asyncio
+import sys
+
+from src.app.db.repos.game_repo import GameRepo
+from src.app.db.session import AsyncSessionLocal
+from src.app.db.uow import UnitOfWork
+
+BATCH = 1000
+
+
+async def main() -> int:
+    repaired = 0
+    async with AsyncSessionLocal() as session:
+        repo = GameRepo(session)
+        max_id = await repo.get_max_game_id()
+        # пачками по id, чтобы не держать блокировки на всей таблице games
+        for first_id in range(1, max_id + 1, BATCH):
+            async with UnitOfWork(session):
+                repaired += await repo.recount_participants(first_id, first_id + BATCH - 1)
+
+    print(f"participant_count repaired for {repaired} games")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,67 @@
+"""Архивация старых игр и восстановление по коду.
+
+В архив уходят только разыгранные игры (status = 'drawn'), жеребьёвка которых была раньше чем DAYS дней назад;
+открытые и закрытые без жеребьёвки остаются на месте, сколько бы им ни было.
+
+Команда работает в отдельном процессе, поэтому кэши игр в процессах бота сбрасываются через
+Postgres NOTIFY (канал game_cache, см. GameCacheListener). Если слушатель выключен
+(GAME_CACHE_LISTEN=false, DB_PGBOUNCER) или переподключается, бот может ещё до GAME_CACHE_TTL секунд
+показывать заархивированную игру и до GAME_CODE_NEGATIVE_CACHE_TTL секунд отвечать «нет такой игры»
+на код только что восстановленной.
+
+Игры с недоставленными сообщениями outbox или невыполненными задачами расписания не архивируются:
+они попадут в следующий прогон.
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+from src.app.db.session import AsyncSessionLocal
+from src.app.services.retention_service import RetentionService
+from src.app.settings import settings
+
+USAGE = (
+    "usage:\n"
+    "  python -m src.app.commands.retention archive [DAYS]\n"
+    "  python -m src.app.commands.retention restore CODE"
+)
+
+
+async def archive(days: int) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    archived = 0
+    async with AsyncSessionLocal() as session:
+        serv = RetentionService(session)
+        # маленькие пачки, каждая в своей транзакции: блокировки на games живут доли секунды
+        while True:
+            moved = await serv.archive_batch(cutoff, settings.RETENTION_BATCH_SIZE)
+            archived += moved
+            if moved < settings.RETENTION_BATCH_SIZE:
+                break
+            await asyncio.sleep(settings.RETENTION_BATCH_PAUSE)
+
+    print(f"archived {archived} games older than {days} days")
+    return 0
+
+
+async def restore(code: str) -> int:
+    async with AsyncSessionLocal() as session:
+        res = await RetentionService(session).restore_by_code(code)
+    if not res.ok:
+        print(f"restore failed: {res.reason}")
+        return 1
+    print(f"restored game {res.game_id} ({res.game_name})")
+    return 0
+
+
+async def main(argv: list[str]) -> int:
+    if argv[:1] == ["archive"] and len(argv) <= 2:
+        return await archive(int(argv[1]) if len(argv) == 2 else settings.RETENTION_DAYS)
+    if argv[:1] == ["restore"] and len(argv) == 2:
+        return await restore(argv[1])
+    print(USAGE)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
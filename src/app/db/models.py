@@ -1,5 +1,8 @@
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, relationship, mapped_column, DeclarativeBase
-from sqlalchemy import ForeignKey, UniqueConstraint, CheckConstraint, BigInteger
+from sqlalchemy import ForeignKey, UniqueConstraint, CheckConstraint, BigInteger, DateTime, Index, func, text
 
 
 class Base(DeclarativeBase):
@@ -8,6 +11,9 @@ class Base(DeclarativeBase):
 
 class Game(Base):
     __tablename__ = 'games'
+    __table_args__ = (
+        Index("ix_games_owner_id_id", "owner_id", "id", postgresql_include=["name"]),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(nullable=False)
@@ -15,6 +21,12 @@ class Game(Base):
     code: Mapped[str] = mapped_column(unique=True, nullable=False, index=True)
     status: Mapped[str] = mapped_column(nullable=False)
     owner_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    participant_count: Mapped[int] = mapped_column(nullable=False, server_default="0")
+    draw_generation: Mapped[int] = mapped_column(nullable=False, server_default="0")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    drawn_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     players: Mapped[list["Player"]] = relationship(
         back_populates="game",
@@ -26,6 +38,7 @@ class Player(Base):
     __tablename__ = 'players'
     __table_args__ = (
         UniqueConstraint("game_id", "tg_id", name="unique_players_game"),
+        Index("ix_players_tg_id_game_id", "tg_id", "game_id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -43,9 +56,124 @@ class Assignment(Base):
         UniqueConstraint("game_id", "giver_id", name="unique_assignment_game_giver"),
         UniqueConstraint("game_id", "receiver_id", name="unique_assignment_game_receiver"),
         CheckConstraint("giver_id <> receiver_id", name="check_not_self"),
+        Index("ix_assignments_giver_id", "giver_id"),
+        Index("ix_assignments_receiver_id", "receiver_id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     game_id: Mapped[int] = mapped_column(ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
     giver_id: Mapped[int] = mapped_column(ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
-    receiver_id: Mapped[int] = mapped_column(ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
\ No newline at end of file
+    receiver_id: Mapped[int] = mapped_column(ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+
+
+class OutboxMessage(Base):
+    __tablename__ = 'outbox'
+    __table_args__ = (
+        Index(
+            "ix_outbox_due",
+            "next_attempt_at",
+            postgresql_where=text("status IN ('pending', 'sending')"),
+        ),
+        Index("ix_outbox_game_id", "game_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    game_id: Mapped[int] = mapped_column(ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
+    kind: Mapped[str] = mapped_column(nullable=False, server_default="draw")
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    body: Mapped[str] = mapped_column(nullable=False)
+    status: Mapped[str] = mapped_column(nullable=False, server_default="pending")
+    attempts: Mapped[int] = mapped_column(nullable=False, server_default="0")
+    last_error: Mapped[str | None] = mapped_column(nullable=True)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class FsmState(Base):
+    __tablename__ = 'fsm_states'
+
+    bot_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    state: Mapped[str | None] = mapped_column(nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default="{}")
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class ScheduledJob(Base):
+    __tablename__ = 'scheduled_jobs'
+    __table_args__ = (
+        Index(
+            "ix_scheduled_jobs_due",
+            "run_at",
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+        Index("ix_scheduled_jobs_game_id", "game_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    game_id: Mapped[int] = mapped_column(ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
+    kind: Mapped[str] = mapped_column(nullable=False)  # lock / draw / remind
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default="{}")
+    run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    status: Mapped[str] = mapped_column(nullable=False, server_default="pending")
+    attempts: Mapped[int] = mapped_column(nullable=False, server_default="0")
+    last_error: Mapped[str | None] = mapped_column(nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+# архив: те же колонки, что у games/players/assignments, но без внешних ключей на живые таблицы,
+# чтобы старые игры не раздували индексы, по которым работают /groups и /join
+class ArchivedGame(Base):
+    __tablename__ = 'archived_games'
+    __table_args__ = (
+        Index("ix_archived_games_code", "code"),
+        Index("ix_archived_games_owner_id", "owner_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    name: Mapped[str] = mapped_column(nullable=False)
+    money: Mapped[str] = mapped_column(nullable=False)
+    code: Mapped[str] = mapped_column(nullable=False)
+    status: Mapped[str] = mapped_column(nullable=False)
+    owner_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    participant_count: Mapped[int] = mapped_column(nullable=False)
+    draw_generation: Mapped[int] = mapped_column(nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    drawn_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class ArchivedPlayer(Base):
+    __tablename__ = 'archived_players'
+    __table_args__ = (
+        Index("ix_archived_players_game_id", "game_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    game_id: Mapped[int] = mapped_column(ForeignKey("archived_games.id", ondelete="CASCADE"), nullable=False)
+    tg_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    name: Mapped[str] = mapped_column(nullable=False)
+    username: Mapped[str] = mapped_column(nullable=False)
+
+
+class ArchivedAssignment(Base):
+    __tablename__ = 'archived_assignments'
+    __table_args__ = (
+        Index("ix_archived_assignments_game_id", "game_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    game_id: Mapped[int] = mapped_column(ForeignKey("archived_games.id", ondelete="CASCADE"), nullable=False)
+    giver_id: Mapped[int] = mapped_column(nullable=False)
+    receiver_id: Mapped[int] = mapped_column(nullable=False)
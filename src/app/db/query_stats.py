@@ -0,0 +1,100 @@
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Iterator
+
+from sqlalchemy import event
+
+from src.app.db.session import engine
+from src.app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+# execution option: запросы с ним не попадают в QueryStats (служебные запросы вроде FSM-хранилища,
+# чтобы бюджеты хендлеров не зависели от FSM_STORAGE); медленные всё равно логируются
+UNTRACKED_OPTION = "untracked_queries"
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    def __init__(self, parent: "QueryStats | None" = None) -> None:
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements: list[str] = []
+        # вложенный подсчёт (мидлварь внутри assert_max_queries) виден и во внешнем
+        self.parent = parent
+
+    def record(self, statement: str, seconds: float) -> None:
+        stats: QueryStats | None = self
+        while stats is not None:
+            stats.queries += 1
+            stats.seconds += seconds
+            stats.statements.append(statement)
+            stats = stats.parent
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    stats = QueryStats(current_query_stats.get())
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+@asynccontextmanager
+async def assert_max_queries(limit: int) -> AsyncIterator[QueryStats]:
+    with track_queries() as stats:
+        yield stats
+    if stats.queries > limit:
+        raise QueryBudgetExceeded(
+            f"{stats.queries} queries, budget {limit}:\n" + "\n".join(stats.statements)
+        )
+
+
+@contextmanager
+def record_query(statement: str) -> Iterator[None]:
+    # для запросов мимо курсора SQLAlchemy (COPY на сырой asyncpg-коннекции): хуки ниже их не видят
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(statement, time.perf_counter() - start, tracked=True)
+
+
+def _record(statement: str, elapsed: float, *, tracked: bool) -> None:
+    stats = current_query_stats.get()
+    if stats is not None and tracked:
+        stats.record(statement, elapsed)
+
+    if settings.DB_SLOW_QUERY_MS and elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+        logger.warning("slow query %.1f ms: %s", elapsed * 1000, statement)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    # greenlet_spawn выполняет синхронную часть в контексте вызывающей корутины,
+    # так что contextvar апдейта здесь виден
+    _record(statement, elapsed, tracked=not context.execution_options.get(UNTRACKED_OPTION))
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _on_error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
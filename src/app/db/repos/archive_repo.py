@@ -0,0 +1,81 @@
+from datetime import datetime
+
+from sqlalchemy import Table, select, insert, delete, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.db.models import (
+    ArchivedAssignment,
+    ArchivedGame,
+    ArchivedPlayer,
+    Assignment,
+    Game,
+    OutboxMessage,
+    Player,
+    ScheduledJob,
+)
+from src.app.db.repos.outbox_repo import ACTIVE_STATUSES as OUTBOX_ACTIVE_STATUSES
+from src.app.db.repos.schedule_repo import ACTIVE_STATUSES as JOB_ACTIVE_STATUSES
+
+# (живая таблица, архивная, колонка с id игры); колонки берём у живой, archived_at архив проставит сам
+_TABLES: tuple[tuple[Table, Table, str], ...] = (
+    (Game.__table__, ArchivedGame.__table__, "id"),
+    (Player.__table__, ArchivedPlayer.__table__, "game_id"),
+    (Assignment.__table__, ArchivedAssignment.__table__, "game_id"),
+)
+
+
+def _copy(cols: list[str], src: Table, dst: Table, game_col: str, game_ids: list[int]):
+    return insert(dst).from_select(cols, select(*(src.c[name] for name in cols)).where(src.c[game_col].in_(game_ids)))
+
+
+class ArchiveRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def archive_batch(self, cutoff: datetime, limit: int) -> list[tuple[int, str]]:
+        # в архив — только разыгранные игры: открытая или закрытая без жеребьёвки может ещё собирать игроков.
+        # SKIP LOCKED: игру, с которой сейчас кто-то работает, просто пропускаем до следующего прогона.
+        # outbox и scheduled_jobs в архив не копируются и уйдут каскадом, поэтому игры с недоставленными
+        # сообщениями или невыполненными задачами не трогаем — дождутся следующего прогона
+        pending_outbox = exists().where(
+            OutboxMessage.game_id == Game.id, OutboxMessage.status.in_(OUTBOX_ACTIVE_STATUSES)
+        )
+        pending_jobs = exists().where(ScheduledJob.game_id == Game.id, ScheduledJob.status.in_(JOB_ACTIVE_STATUSES))
+        victims = await self.session.execute(
+            select(Game.id, Game.code)
+            .where(
+                Game.status == "drawn",
+                Game.drawn_at < cutoff,
+                ~pending_outbox,
+                ~pending_jobs,
+            )
+            .order_by(Game.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        rows = [(game_id, code) for game_id, code in victims.all()]
+        if not rows:
+            return []
+
+        game_ids = [game_id for game_id, _ in rows]
+        for live, archived, game_col in _TABLES:
+            await self.session.execute(_copy([c.name for c in live.columns], live, archived, game_col, game_ids))
+        # players, assignments и история outbox/scheduled_jobs уходят каскадом
+        await self.session.execute(delete(Game).where(Game.id.in_(game_ids)))
+        return rows
+
+    async def get_archived_by_code(self, code: str) -> ArchivedGame | None:
+        res = await self.session.execute(
+            select(ArchivedGame)
+            .where(ArchivedGame.code == code)
+            .order_by(ArchivedGame.archived_at.desc())
+            .limit(1)
+            .with_for_update()
+        )
+        return res.scalar_one_or_none()
+
+    async def restore_game(self, game_id: int) -> None:
+        # обратный путь: id сохраняются, поэтому ссылки assignments -> players остаются верными
+        for live, archived, game_col in _TABLES:
+            await self.session.execute(_copy([c.name for c in live.columns], archived, live, game_col, [game_id]))
+        await self.session.execute(delete(ArchivedGame).where(ArchivedGame.id == game_id))
@@ -1,10 +1,18 @@
 from typing import Sequence
 
-from sqlalchemy import select, delete
+import asyncpg
+from sqlalchemy import select, delete, insert
+from sqlalchemy.orm import aliased
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.app.db.models import Player, Assignment
+from src.app.db.models import ArchivedAssignment, ArchivedGame, ArchivedPlayer, Game, Player, Assignment
+from src.app.db.query_stats import record_query
+
+# с какого размера COPY обгоняет многострочный INSERT
+COPY_THRESHOLD = 500
+
+_table = Assignment.__table__
 
 
 class AssignmentRepo:
@@ -21,18 +29,34 @@ class AssignmentRepo:
         if replace:
             await self.session.execute(delete(Assignment).where(Assignment.game_id == game_id))
 
-        self.session.add_all(
-            [
-                Assignment(game_id=game_id, giver_id=giver_id, receiver_id=receiver_id)
-                for giver_id, receiver_id in pairs
-            ]
+        rows = [(game_id, giver_id, receiver_id) for giver_id, receiver_id in pairs]
+        if len(rows) >= COPY_THRESHOLD:
+            await self._copy_rows(rows)
+        elif rows:
+            await self._insert_rows(rows)
+
+    async def _insert_rows(self, rows: list[tuple[int, int, int]]) -> None:
+        # core executemany: SQLAlchemy склеивает это в многострочные INSERT, без ORM-объектов
+        await self.session.execute(
+            insert(_table),
+            [{"game_id": g, "giver_id": giver, "receiver_id": receiver} for g, giver, receiver in rows],
         )
 
+    async def _copy_rows(self, rows: list[tuple[int, int, int]]) -> None:
+        conn = await self.session.connection()
+        raw = (await conn.get_raw_connection()).driver_connection
+        if not raw.is_in_transaction():
+            # asyncpg-адаптер открывает транзакцию лениво; COPY должен попасть в неё же
+            await conn.exec_driver_sql("SELECT 1")
         try:
-            await self.session.commit()
-        except IntegrityError:
-            await self.session.rollback()
-            raise
+            with record_query(f"COPY {_table.name} ({len(rows)} rows)"):
+                await raw.copy_records_to_table(
+                    _table.name,
+                    records=rows,
+                    columns=["game_id", "giver_id", "receiver_id"],
+                )
+        except asyncpg.IntegrityConstraintViolationError as e:
+            raise IntegrityError("COPY assignments", None, e) from e
 
     async def get_assignment_for_user(self, game_id: int, giver_id: int) -> Assignment | None:
         res = await self.session.execute(
@@ -51,3 +75,34 @@ class AssignmentRepo:
         )
         res = await self.session.execute(stmt)
         return res.scalar_one_or_none()
+
+    async def list_previous_pairs(self, owner_id: int, game_id: int) -> list[tuple[int, int]]:
+        # (tg_id дарителя, tg_id получателя) из других игр этого админа
+        giver = aliased(Player)
+        receiver = aliased(Player)
+        current = select(Player.tg_id).where(Player.game_id == game_id)
+        stmt = (
+            select(giver.tg_id, receiver.tg_id)
+            .select_from(Assignment)
+            .join(Game, Game.id == Assignment.game_id)
+            .join(giver, giver.id == Assignment.giver_id)
+            .join(receiver, receiver.id == Assignment.receiver_id)
+            .where(
+                Game.owner_id == owner_id,
+                Game.id != game_id,
+                giver.tg_id.in_(current),
+            )
+        )
+        # прошлогодние игры уже могли уехать в архив — их пары тоже учитываем
+        a_giver = aliased(ArchivedPlayer)
+        a_receiver = aliased(ArchivedPlayer)
+        archived = (
+            select(a_giver.tg_id, a_receiver.tg_id)
+            .select_from(ArchivedAssignment)
+            .join(ArchivedGame, ArchivedGame.id == ArchivedAssignment.game_id)
+            .join(a_giver, a_giver.id == ArchivedAssignment.giver_id)
+            .join(a_receiver, a_receiver.id == ArchivedAssignment.receiver_id)
+            .where(ArchivedGame.owner_id == owner_id, a_giver.tg_id.in_(current))
+        )
+        res = await self.session.execute(stmt.union_all(archived))
+        return [(g, r) for g, r in res.all()]
@@ -1,73 +1,145 @@
 from __future__ import annotations
 
-from sqlalchemy import select, update, func, delete
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, update, func, delete, insert, Select, literal
+from sqlalchemy.dialects.postgresql import array
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.app.db.models import Game, Player
 
+# первый ключ двухключевой advisory-блокировки, чтобы не пересекаться с чужими блокировками по id
+DRAW_LOCK_NAMESPACE = 7001
+
+# канал LISTEN/NOTIFY: payload "<game_id>:<code>", кэши игры сбрасывают все процессы бота
+GAME_CACHE_CHANNEL = "game_cache"
+
 
 class GameRepo:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def create_game(self, name: str, money: str, code: str, owner_id: int) -> Game:
-        game = Game(
-            owner_id=owner_id,
-            code=code,
-            name=name,
-            money=money,
-            status="open",
+        res = await self.session.scalars(
+            insert(Game)
+            .values(owner_id=owner_id, code=code, name=name, money=money, status="open")
+            .returning(Game)
         )
-        self.session.add(game)
-        try:
-            await self.session.commit()
-        except IntegrityError:
-            await self.session.rollback()
-            raise
-        await self.session.refresh(game)
-        return game
+        return res.one()
 
     async def get_game_by_code(self, game_code: str) -> Game | None:
         res = await self.session.execute(select(Game).where(Game.code == game_code))
         return res.scalar_one_or_none()
 
-    async def get_game_by_id(self, game_id: int) -> Game | None:
-        res = await self.session.execute(select(Game).where(Game.id == game_id))
+    async def get_game_by_id(self, game_id: int, *, for_update: bool = False) -> Game | None:
+        stmt = select(Game).where(Game.id == game_id)
+        if for_update:
+            stmt = stmt.with_for_update()
+        res = await self.session.execute(stmt)
         return res.scalar_one_or_none()
 
     async def get_money_by_id(self, game_id: int) -> str | None:
         res = await self.session.execute(select(Game.money).where(Game.id == game_id))
         return res.scalar_one_or_none()
 
-    async def set_game_status(self, game_id: int, status: str) -> None:
-        await self.session.execute(
-            update(Game).where(Game.id == game_id).values(status=status)
+    async def set_game_status(self, game_id: int, status: str, *, expected: str | None = None) -> str | None:
+        stmt = update(Game).where(Game.id == game_id)
+        if expected is not None:
+            stmt = stmt.where(Game.status == expected)
+        res = await self.session.execute(stmt.values(status=status).returning(Game.code))
+        return res.scalar_one_or_none()
+
+    async def try_lock_for_draw(self, game_id: int) -> bool:
+        # снимается сама на commit/rollback транзакции
+        res = await self.session.execute(select(func.pg_try_advisory_xact_lock(DRAW_LOCK_NAMESPACE, game_id)))
+        return bool(res.scalar_one())
+
+    async def finish_draw(self, game_id: int, generation: int) -> bool:
+        res = await self.session.execute(
+            update(Game)
+            .where(Game.id == game_id, Game.draw_generation == generation)
+            .values(status="drawn", draw_generation=generation + 1, drawn_at=func.now())
+            .returning(Game.id)
         )
-        await self.session.commit()
+        return res.scalar_one_or_none() is not None
 
-    async def list_games_by_admin(self, tg_id: int) -> list[Game]:
-        stmt = select(Game).where(Game.owner_id == tg_id).order_by(Game.id.desc())
-        res = await self.session.execute(stmt)
-        return list(res.scalars().all())
+    async def list_games_by_admin(
+        self,
+        tg_id: int,
+        *,
+        before_id: int | None = None,
+        after_id: int | None = None,
+        limit: int = 50,
+    ) -> list[tuple[int, str]]:
+        stmt = select(Game.id, Game.name).where(Game.owner_id == tg_id)
+        return await self._keyset_page(stmt, before_id=before_id, after_id=after_id, limit=limit)
 
-    async def list_games_by_player(self, tg_id: int) -> list[Game]:
+    async def list_games_by_player(
+        self,
+        tg_id: int,
+        *,
+        before_id: int | None = None,
+        after_id: int | None = None,
+        limit: int = 50,
+    ) -> list[tuple[int, str]]:
         stmt = (
-            select(Game)
+            select(Game.id, Game.name)
             .join(Player, Player.game_id == Game.id)
             .where(Player.tg_id == tg_id)
-            .order_by(Game.id.desc())
         )
-        res = await self.session.execute(stmt)
-        return list(res.scalars().all())
+        return await self._keyset_page(stmt, before_id=before_id, after_id=after_id, limit=limit)
+
+    async def _keyset_page(
+        self,
+        stmt: Select,
+        *,
+        before_id: int | None,
+        after_id: int | None,
+        limit: int,
+    ) -> list[tuple[int, str]]:
+        # страницы идут от новых к старым; after_id — шаг назад, к более новым
+        if after_id is not None:
+            stmt = stmt.where(Game.id > after_id).order_by(Game.id.asc())
+        else:
+            if before_id is not None:
+                stmt = stmt.where(Game.id < before_id)
+            stmt = stmt.order_by(Game.id.desc())
+
+        res = await self.session.execute(stmt.limit(limit))
+        rows = [(game_id, name) for game_id, name in res.all()]
+        if after_id is not None:
+            rows.reverse()
+        return rows
 
     async def count_participants(self, game_id: int) -> int:
         stmt = select(func.count(Player.id)).where(Player.game_id == game_id)
         res = await self.session.execute(stmt)
         return int(res.scalar_one())
 
-    async def delete_game(self, game_id: int) -> bool:
-        res = await self.session.execute(delete(Game).where(Game.id == game_id))
-        await self.session.commit()
-        return (res.rowcount or 0) > 0
+    async def recount_participants(self, first_id: int, last_id: int) -> int:
+        actual = (
+            select(func.count(Player.id))
+            .where(Player.game_id == Game.id)
+            .correlate(Game)
+            .scalar_subquery()
+        )
+        res = await self.session.execute(
+            update(Game)
+            .where(Game.id.between(first_id, last_id), Game.participant_count != actual)
+            .values(participant_count=actual)
+            .execution_options(synchronize_session=False)
+        )
+        return res.rowcount or 0
+
+    async def get_max_game_id(self) -> int:
+        res = await self.session.execute(select(func.coalesce(func.max(Game.id), 0)))
+        return int(res.scalar_one())
+
+    async def delete_game(self, game_id: int) -> str | None:
+        res = await self.session.execute(delete(Game).where(Game.id == game_id).returning(Game.code))
+        return res.scalar_one_or_none()
 
+    async def notify_games_changed(self, games: list[tuple[int, str]]) -> None:
+        # pg_notify транзакционный: слушатели получат сообщения только после коммита
+        if not games:
+            return
+        payload = func.unnest(array([f"{game_id}:{code}" for game_id, code in games])).column_valued("payload")
+        await self.session.execute(select(func.pg_notify(literal(GAME_CACHE_CHANNEL), payload)))
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+
+from sqlalchemy import select, update, func, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.db.models import OutboxMessage, Player
+
+ACTIVE_STATUSES = ("pending", "sending")
+
+
+class OutboxRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add_messages(
+        self,
+        game_id: int,
+        messages: Sequence[tuple[int, str]],
+        *,
+        kind: str = "draw",
+    ) -> None:
+        if not messages:
+            return
+        await self.session.execute(
+            insert(OutboxMessage),
+            [
+                {"game_id": game_id, "kind": kind, "chat_id": chat_id, "body": body}
+                for chat_id, body in messages
+            ],
+        )
+
+    async def clear_messages(self, game_id: int, *, kind: str = "draw") -> None:
+        await self.session.execute(
+            delete(OutboxMessage).where(OutboxMessage.game_id == game_id, OutboxMessage.kind == kind)
+        )
+
+    async def claim_batch(self, limit: int, lease_seconds: float) -> list[OutboxMessage]:
+        due = (
+            select(OutboxMessage.id)
+            .where(
+                OutboxMessage.status.in_(ACTIVE_STATUSES),
+                OutboxMessage.next_attempt_at <= func.now(),
+            )
+            .order_by(OutboxMessage.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(due.scalar_subquery()))
+            .values(
+                status="sending",
+                attempts=OutboxMessage.attempts + 1,
+                next_attempt_at=func.now() + timedelta(seconds=lease_seconds),
+            )
+            .returning(OutboxMessage)
+        )
+        res = await self.session.scalars(stmt, execution_options={"synchronize_session": False})
+        return list(res.all())
+
+    async def save_results(
+        self,
+        sent_ids: Sequence[int],
+        failures: Sequence[tuple[int, str, datetime | None]],
+    ) -> None:
+        if sent_ids:
+            await self.session.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_(sent_ids))
+                .values(status="sent", last_error=None, sent_at=func.now())
+            )
+        if failures:
+            now = datetime.now(timezone.utc)
+            await self.session.execute(
+                update(OutboxMessage),
+                [
+                    {
+                        "id": message_id,
+                        "status": "failed" if retry_at is None else "pending",
+                        "last_error": error[:500],
+                        "next_attempt_at": retry_at or now,
+                    }
+                    for message_id, error, retry_at in failures
+                ],
+            )
+
+    async def requeue_failed(self, game_id: int, *, kind: str = "draw") -> int:
+        res = await self.session.execute(
+            update(OutboxMessage)
+            .where(
+                OutboxMessage.game_id == game_id,
+                OutboxMessage.kind == kind,
+                OutboxMessage.status == "failed",
+            )
+            .values(status="pending", attempts=0, next_attempt_at=func.now())
+        )
+        return res.rowcount or 0
+
+    async def count_by_status(self, game_id: int, *, kind: str = "draw") -> dict[str, int]:
+        res = await self.session.execute(
+            select(OutboxMessage.status, func.count(OutboxMessage.id))
+            .where(OutboxMessage.game_id == game_id, OutboxMessage.kind == kind)
+            .group_by(OutboxMessage.status)
+        )
+        return {status: cnt for status, cnt in res.all()}
+
+    async def list_failed_players(self, game_id: int, *, kind: str = "draw", limit: int = 20) -> list[Player]:
+        stmt = (
+            select(Player)
+            .join(
+                OutboxMessage,
+                (OutboxMessage.game_id == Player.game_id) & (OutboxMessage.chat_id == Player.tg_id),
+            )
+            .where(
+                OutboxMessage.game_id == game_id,
+                OutboxMessage.kind == kind,
+                OutboxMessage.status == "failed",
+            )
+            .order_by(Player.id.asc())
+            .limit(limit)
+        )
+        res = await self.session.execute(stmt)
+        return list(res.scalars().all())
@@ -1,24 +1,50 @@
-from sqlalchemy import select, delete
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import BigInteger, Row, String, literal, select, delete, true, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.app.db.models import Player
+from src.app.db.models import Game, Player
 
 
 class PlayerRepo:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def add_participant(self, game_id: int, tg_id: int, name: str, username: str) -> Player:
-        player = Player(game_id=game_id, tg_id=tg_id, name=name, username=username)
-        self.session.add(player)
-        try:
-            await self.session.commit()
-        except IntegrityError:
-            await self.session.rollback()
-            raise
-        await self.session.refresh(player)
-        return player
+    async def join_by_code(self, code: str, tg_id: int, name: str, username: str) -> Row | None:
+        # один запрос: найти игру, вставить игрока только в открытую игру, сдвинуть счётчик.
+        # строки нет — кода нет; player_id пустой — игра закрыта или игрок уже в ней.
+        # строка игры блокируется: смена статуса (lock, жеребьёвка) ждёт вход или вход видит новый статус.
+        # NO KEY UPDATE, а не SHARE: ниже та же строка обновляется, и два FOR SHARE-входа заперли бы друг друга
+        game = (
+            select(Game.id, Game.status, Game.name)
+            .where(Game.code == code)
+            .with_for_update(key_share=True)
+            .cte("game")
+        )
+        inserted = (
+            insert(Player)
+            .from_select(
+                ["game_id", "tg_id", "name", "username"],
+                select(game.c.id, literal(tg_id, BigInteger), literal(name, String), literal(username, String))
+                .where(game.c.status == "open"),
+            )
+            .on_conflict_do_nothing(constraint="unique_players_game")
+            .returning(Player.id, Player.game_id)
+            .cte("inserted")
+        )
+        counted = (
+            update(Game)
+            .where(Game.id == select(inserted.c.game_id).scalar_subquery())
+            .values(participant_count=Game.participant_count + 1)
+            .returning(Game.id)
+            .cte("counted")
+        )
+        stmt = (
+            select(game.c.id, game.c.status, game.c.name, inserted.c.id.label("player_id"))
+            .outerjoin(inserted, true())
+            .add_cte(counted)
+        )
+        res = await self.session.execute(stmt)
+        return res.one_or_none()
 
     async def list_participants(self, game_id: int) -> list[Player]:
         res = await self.session.execute(
@@ -26,6 +52,16 @@ class PlayerRepo:
         )
         return list(res.scalars().all())
 
+    async def list_participants_page(self, game_id: int, after_id: int, limit: int) -> list[tuple[int, str, str]]:
+        # keyset по id: каждая страница — отдельный короткий запрос, без курсора на всё время рассылки
+        res = await self.session.execute(
+            select(Player.id, Player.name, Player.username)
+            .where(Player.game_id == game_id, Player.id > after_id)
+            .order_by(Player.id.asc())
+            .limit(limit)
+        )
+        return [(player_id, name, username) for player_id, name, username in res.all()]
+
     async def get_player_by_id(self, player_id: int) -> Player | None:
         res = await self.session.execute(select(Player).where(Player.id == player_id))
         return res.scalar_one_or_none()
@@ -40,5 +76,15 @@ class PlayerRepo:
         res = await self.session.execute(
             delete(Player).where(Player.game_id == game_id, Player.tg_id == tg_id)
         )
-        await self.session.commit()
-        return (res.rowcount or 0) > 0
+        removed = res.rowcount or 0
+        if removed:
+            await self._shift_count(game_id, -removed)
+        return removed > 0
+
+    async def _shift_count(self, game_id: int, delta: int) -> None:
+        # счётчик двигается в той же транзакции, что и вставка/удаление игрока
+        await self.session.execute(
+            update(Game)
+            .where(Game.id == game_id)
+            .values(participant_count=Game.participant_count + delta)
+        )
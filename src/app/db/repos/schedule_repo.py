@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, func, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.db.models import ScheduledJob
+
+ACTIVE_STATUSES = ("pending", "running")
+
+
+class ScheduleRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add_job(self, game_id: int, kind: str, run_at: datetime, payload: dict | None = None) -> int:
+        res = await self.session.execute(
+            insert(ScheduledJob)
+            .values(game_id=game_id, kind=kind, run_at=run_at, payload=payload or {})
+            .returning(ScheduledJob.id)
+        )
+        return res.scalar_one()
+
+    async def cancel_jobs(self, game_id: int, kind: str | None = None) -> int:
+        stmt = delete(ScheduledJob).where(ScheduledJob.game_id == game_id, ScheduledJob.status == "pending")
+        if kind is not None:
+            stmt = stmt.where(ScheduledJob.kind == kind)
+        res = await self.session.execute(stmt)
+        return res.rowcount or 0
+
+    async def list_jobs(self, game_id: int) -> list[ScheduledJob]:
+        res = await self.session.execute(
+            select(ScheduledJob)
+            .where(ScheduledJob.game_id == game_id, ScheduledJob.status.in_(ACTIVE_STATUSES))
+            .order_by(ScheduledJob.run_at)
+        )
+        return list(res.scalars().all())
+
+    async def next_run_times(self, limit: int) -> list[datetime]:
+        # только голова частичного индекса ix_scheduled_jobs_due — без обхода всех игр
+        res = await self.session.execute(
+            select(ScheduledJob.run_at)
+            .where(ScheduledJob.status.in_(ACTIVE_STATUSES))
+            .order_by(ScheduledJob.run_at)
+            .limit(limit)
+        )
+        return list(res.scalars().all())
+
+    async def claim_due(self, limit: int, lease_seconds: float) -> list[ScheduledJob]:
+        # SKIP LOCKED: несколько реплик разбирают разные задачи; run_at сдвигается на время аренды,
+        # так что задача упавшей реплики вернётся в работу сама
+        due = (
+            select(ScheduledJob.id)
+            .where(
+                ScheduledJob.status.in_(ACTIVE_STATUSES),
+                ScheduledJob.run_at <= func.now(),
+            )
+            .order_by(ScheduledJob.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(ScheduledJob)
+            .where(ScheduledJob.id.in_(due.scalar_subquery()))
+            .values(
+                status="running",
+                attempts=ScheduledJob.attempts + 1,
+                run_at=func.now() + timedelta(seconds=lease_seconds),
+            )
+            .returning(ScheduledJob)
+        )
+        res = await self.session.scalars(stmt, execution_options={"synchronize_session": False})
+        return list(res.all())
+
+    async def finish_job(self, job_id: int, *, error: str | None = None) -> None:
+        await self.session.execute(
+            update(ScheduledJob)
+            .where(ScheduledJob.id == job_id)
+            .values(status="failed" if error else "done", last_error=error, finished_at=func.now())
+        )
+
+    async def retry_job(self, job_id: int, run_at: datetime, error: str) -> None:
+        await self.session.execute(
+            update(ScheduledJob)
+            .where(ScheduledJob.id == job_id)
+            .values(status="pending", last_error=error[:500], run_at=run_at)
+        )
+
+    async def postpone_job(self, job_id: int, run_at: datetime) -> None:
+        # задача не падала, а упёрлась в занятый ресурс: попытку, списанную в claim_due, возвращаем
+        await self.session.execute(
+            update(ScheduledJob)
+            .where(ScheduledJob.id == job_id)
+            .values(status="pending", attempts=ScheduledJob.attempts - 1, run_at=run_at)
+        )
@@ -1,14 +1,105 @@
+import time
 from typing import AsyncGenerator
+from uuid import uuid4
 
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.app.settings import settings
 
+
+class PoolStats:
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_total += seconds
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        finally:
+            pool_stats.record_wait(time.perf_counter() - start)
+
+
+def _connect_args() -> dict:
+    if settings.DB_PGBOUNCER:
+        # pgbouncer в transaction mode: prepared statements не переживают смену бэкенда
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+# при BOT_WORKERS > 1 у каждого процесса свой пул; делим лимиты, чтобы в сумме соединений было столько же
+_POOL_SHARE = max(1, settings.BOT_WORKERS)
+
 engine = create_async_engine(
     settings.DB_URL,
-    echo=False
+    echo=False,
+    poolclass=InstrumentedPool,
+    pool_size=max(1, settings.DB_POOL_SIZE // _POOL_SHARE),
+    max_overflow=settings.DB_MAX_OVERFLOW // _POOL_SHARE,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=_connect_args(),
 )
 
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_conn, conn_record, conn_proxy) -> None:
+    pool_stats.checkouts += 1
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_conn, conn_record) -> None:
+    pool_stats.connects += 1
+
+
+@event.listens_for(engine.sync_engine, "invalidate")
+def _on_invalidate(dbapi_conn, conn_record, exception) -> None:
+    pool_stats.invalidations += 1
+
+
+def get_pool_status() -> dict[str, float]:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checked_in": pool.checkedin(),
+        "checkouts": pool_stats.checkouts,
+        "connects": pool_stats.connects,
+        "invalidations": pool_stats.invalidations,
+        "timeouts": pool_stats.timeouts,
+        "wait_seconds_total": pool_stats.wait_total,
+        "wait_seconds_max": pool_stats.wait_max,
+    }
+
+
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     expire_on_commit=False
@@ -20,4 +111,4 @@ async def get_async_session() -> AsyncGenerator:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
@@ -0,0 +1,28 @@
+from typing import Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class UnitOfWork:
+    # одна операция сервиса = одна транзакция: репозитории только пишут, коммит здесь
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self._after_commit: list[Callable[[], None]] = []
+
+    def after_commit(self, hook: Callable[[], None]) -> None:
+        # сброс кэшей и прочие побочные эффекты — только если транзакция реально закоммитилась
+        self._after_commit.append(hook)
+
+    async def __aenter__(self) -> "UnitOfWork":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            await self.session.rollback()
+            self._after_commit.clear()
+            return
+
+        await self.session.commit()
+        hooks, self._after_commit = self._after_commit, []
+        for hook in hooks:
+            hook()
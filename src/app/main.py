@@ -1,15 +1,32 @@
 import asyncio
+import multiprocessing
+import signal
+from multiprocessing.queues import Queue
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
-from src.app.bot.DBMiddleware import DbSessionMiddleware
+from src.app.bot.cache_listener import GameCacheListener
+from src.app.bot.DBMiddleware import DbSessionMiddleware, QueryBudgetMiddleware
+from src.app.bot.fsm_storage import PostgresStorage
+from src.app.bot.metrics import add_metrics_route, setup_metrics, track_webhook_queue
+from src.app.bot.outbox import OutboxWorker
+from src.app.bot.scheduler import Scheduler
+from src.app.bot.sharding import ShardWorker, UpdateSharder, poll_raw_updates, raw_webhook_handler
+from src.app.bot.throttling import ThrottlingMiddleware
 from src.app.settings import settings
 
 from aiogram.types import BotCommand, BotCommandScopeDefault
 
 from src.app.bot.handlers.game import game_router
+from src.app.bot.handlers.schedule import schedule_router
 from src.app.bot.handlers.start import start_router
 
 
@@ -18,24 +35,211 @@ async def set_commands(bot: Bot):
         BotCommand(command="create", description="Создать игру"),
         BotCommand(command="join", description="Вступить в игру"),
         BotCommand(command="groups", description="Посмотреть информацию про все группы"),
+        BotCommand(command="schedule", description="Расписание игры: закрытие, жеребьёвка, напоминания"),
         BotCommand(command="start", description="Стартовое сообщение"),
     ]
     await bot.set_my_commands(commands, BotCommandScopeDefault())
 
 
-async def main():
-    bot = Bot(token=settings.TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML),)
-    dp = Dispatcher()
+async def on_startup(outbox_worker: OutboxWorker, scheduler: Scheduler, cache_listener: GameCacheListener) -> None:
+    outbox_worker.start()
+    scheduler.start()
+    # LISTEN через pgbouncer в transaction mode не работает: там кэши игр живут до TTL
+    if settings.GAME_CACHE_LISTEN and not settings.DB_PGBOUNCER:
+        cache_listener.start()
+
+
+async def on_shutdown(outbox_worker: OutboxWorker, scheduler: Scheduler, cache_listener: GameCacheListener) -> None:
+    await cache_listener.stop()
+    await scheduler.stop()
+    await outbox_worker.stop()
+
+
+async def on_webhook_startup(bot: Bot, dispatcher: Dispatcher) -> None:
+    await bot.set_webhook(
+        url=settings.WEBHOOK_URL.rstrip("/") + settings.WEBHOOK_PATH,
+        secret_token=settings.WEBHOOK_SECRET or None,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+        drop_pending_updates=True,
+    )
+
+
+def create_bot() -> Bot:
+    session = None
+    if settings.TELEGRAM_API_URL:
+        # свой Bot API сервер или фейковый телеграм для тестов
+        session = AiohttpSession(api=TelegramAPIServer.from_base(settings.TELEGRAM_API_URL))
+    return Bot(token=settings.TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML),)
+
+
+def create_storage() -> BaseStorage:
+    if settings.FSM_STORAGE == "postgres":
+        return PostgresStorage()
+    return MemoryStorage()
+
+
+def create_dispatcher(bot: Bot, *, throttling: bool = True) -> Dispatcher:
+    dp = Dispatcher(storage=create_storage())
 
     dp.include_router(game_router)
     dp.include_router(start_router)
+    dp.include_router(schedule_router)
+    routers = [game_router, start_router, schedule_router]
 
-    dp.update.middleware(DbSessionMiddleware())
+    db_middleware = DbSessionMiddleware()
+    dp.update.middleware(db_middleware)
+    for router in routers:
+        router.message.middleware(QueryBudgetMiddleware())
+        router.callback_query.middleware(QueryBudgetMiddleware())
+
+    if settings.METRICS_ENABLED:
+        setup_metrics(dp, bot, routers, db_middleware)
+
+    # внешний мидлварь: отброшенный апдейт не берёт сессию из пула
+    if throttling:
+        dp.update.outer_middleware(ThrottlingMiddleware())
+
+    dp["outbox_worker"] = OutboxWorker(bot)
+    dp["scheduler"] = Scheduler(dp["outbox_worker"])
+    dp["cache_listener"] = GameCacheListener()
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+
+    # allowed_updates для поллинга и вебхука берутся отсюда: без callback_query молча умирают все кнопки
+    if "callback_query" not in dp.resolve_used_update_types():
+        raise RuntimeError("callback_query handlers are not visible to resolve_used_update_types()")
+    return dp
+
+
+def create_webhook_app(bot: Bot, dp: Dispatcher) -> web.Application:
+    app = web.Application()
+    request_handler = SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=True,
+        secret_token=settings.WEBHOOK_SECRET or None,
+    )
+    request_handler.register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    if settings.METRICS_ENABLED:
+        track_webhook_queue(request_handler)
+        add_metrics_route(app)
+    return app
+
+
+async def start_metrics_server(port: int = settings.METRICS_PORT) -> web.AppRunner:
+    app = web.Application()
+    add_metrics_route(app)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=settings.METRICS_HOST, port=port).start()
+    return runner
 
-    await set_commands(bot)
 
+async def run_polling(bot: Bot, dp: Dispatcher) -> None:
     await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+
+    # в режиме вебхука /metrics живёт в том же приложении, при поллинге — отдельный порт
+    metrics_runner = await start_metrics_server() if settings.METRICS_ENABLED else None
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher) -> None:
+    dp.startup.register(on_webhook_startup)
+
+    runner = web.AppRunner(create_webhook_app(bot, dp))
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.WEBAPP_HOST, port=settings.WEBAPP_PORT)
+    await site.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        await bot.session.close()
+
+
+async def run_worker(index: int, queue: Queue) -> None:
+    bot = create_bot()
+    dp = create_dispatcher(bot)
+
+    # у каждого воркера свой реестр метрик, поэтому и свой порт: METRICS_PORT + 1 + index
+    metrics_runner = None
+    if settings.METRICS_ENABLED:
+        metrics_runner = await start_metrics_server(settings.METRICS_PORT + 1 + index)
+    await dp.emit_startup(bot=bot, dispatcher=dp, bots=[bot], **dp.workflow_data)
+    try:
+        await ShardWorker(dp, bot, queue).run()
+    finally:
+        await dp.emit_shutdown(bot=bot, dispatcher=dp, bots=[bot], **dp.workflow_data)
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await bot.session.close()
+
+
+def worker_process(index: int, queue: Queue) -> None:
+    # Ctrl+C получает вся группа процессов; воркер останавливает фронт через None в очереди
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(run_worker(index, queue))
+
+
+async def run_sharded(bot: Bot, dp: Dispatcher) -> None:
+    # фронт только принимает апдейты и раскладывает их по процессам, весь разбор и логика — в воркерах
+    ctx = multiprocessing.get_context("spawn")
+    queues = [ctx.Queue() for _ in range(settings.BOT_WORKERS)]
+    workers = [
+        ctx.Process(target=worker_process, args=(i, q), name=f"bot-worker-{i}")
+        for i, q in enumerate(queues)
+    ]
+    for proc in workers:
+        proc.start()
+
+    sharder = UpdateSharder(queues)
+    allowed_updates = dp.resolve_used_update_types()
+    main_task = asyncio.current_task()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, main_task.cancel)
+
+    runner: web.AppRunner | None = None
+    try:
+        if settings.BOT_MODE == "webhook":
+            app = web.Application()
+            app.router.add_post(settings.WEBHOOK_PATH, raw_webhook_handler(sharder, settings.WEBHOOK_SECRET))
+            runner = web.AppRunner(app)
+            await runner.setup()
+            await web.TCPSite(runner, host=settings.WEBAPP_HOST, port=settings.WEBAPP_PORT).start()
+            await on_webhook_startup(bot, dp)
+            await asyncio.Event().wait()
+        else:
+            await bot.delete_webhook(drop_pending_updates=True)
+            await poll_raw_updates(bot, sharder, allowed_updates)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+        sharder.close()
+        for proc in workers:
+            await asyncio.to_thread(proc.join, 30)
+            if proc.is_alive():
+                proc.terminate()
+        await bot.session.close()
+
+
+async def main():
+    bot = create_bot()
+    dp = create_dispatcher(bot)
+
+    await set_commands(bot)
+
+    if settings.BOT_WORKERS > 1:
+        await run_sharded(bot, dp)
+    elif settings.BOT_MODE == "webhook":
+        await run_webhook(bot, dp)
+    else:
+        await run_polling(bot, dp)
 
 
 if __name__ == "__main__":
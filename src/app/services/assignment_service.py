@@ -1,22 +1,32 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from html import escape
 
-from aiogram import Bot
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.app.db.repos.assignment_repo import AssignmentRepo
 from src.app.db.repos.game_repo import GameRepo
+from src.app.db.repos.outbox_repo import OutboxRepo
 from src.app.db.repos.player_repo import PlayerRepo
-from src.app.utils.shuffle import shuffle_list
+from src.app.db.uow import UnitOfWork
+from src.app.services.game_service import invalidate_game_info
+from src.app.utils.draw import DrawInfeasibleError, draw_pairs
 
 
 @dataclass(frozen=True)
 class DrawResult:
     ok: bool
     reason: str
-    delivered: int = 0
-    failed: int = 0
+    queued: int = 0
+
+
+@dataclass(frozen=True)
+class MailingStatus:
+    sent: int
+    pending: int
+    failed: int
+    failed_names: list[str]
 
 
 @dataclass(frozen=True)
@@ -31,41 +41,81 @@ class AssignmentService:
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
-    async def draw_and_notify(self, bot: Bot, game_id: int) -> DrawResult:
+    async def draw_and_notify(self, game_id: int, generation: int | None = None) -> DrawResult:
+        # generation — поколение жеребьёвки, которое видел нажавший кнопку; None у старых кнопок
         game_repo = GameRepo(self.session)
         player_repo = PlayerRepo(self.session)
         assign_repo = AssignmentRepo(self.session)
+        outbox_repo = OutboxRepo(self.session)
+
+        # вся жеребьёвка — одна транзакция под advisory-блокировкой игры:
+        # назначения, outbox и статус пишутся либо все, либо никак, и два запуска не пересекаются
+        async with UnitOfWork(self.session) as uow:
+            if not await game_repo.try_lock_for_draw(game_id):
+                return DrawResult(False, "in_progress")
+
+            # блокировка строки игры: входы по коду ждут конца жеребьёвки и видят статус drawn,
+            # а не добавляют игрока после того, как список участников уже прочитан
+            game = await game_repo.get_game_by_id(game_id, for_update=True)
+            if not game:
+                return DrawResult(False, "not_found")
+            if generation is not None and game.draw_generation != generation:
+                # повторное нажатие: эта жеребьёвка уже прошла, второй раз не рассылаем
+                return DrawResult(False, "already_drawn")
+            if generation is None and game.status == "drawn":
+                # старая кнопка без поколения: отличить перетасовку от повтора нельзя, так что не перетасовываем
+                return DrawResult(False, "already_drawn")
+
+            players = await player_repo.list_participants(game_id)
+            if len(players) < 3:
+                return DrawResult(False, "not_enough")
+
+            # прошлогодние пары того же админа стараемся не повторять
+            by_tg = {p.tg_id: p.id for p in players}
+            previous = await assign_repo.list_previous_pairs(game.owner_id, game_id)
+            avoid = [(by_tg[g], by_tg[r]) for g, r in previous if g in by_tg and r in by_tg]
 
-        players = await player_repo.list_participants(game_id)
-        if len(players) < 3:
-            return DrawResult(False, "not_enough")
-
-        pairs = shuffle_list([p.id for p in players])
-
-        await assign_repo.save_assignments(game_id, pairs, replace=True)
-        await game_repo.set_game_status(game_id, "drawn")
-
-        money = game_repo.get_money_by_id(game_id)
-
-        by_id = {p.id: p for p in players}
-
-        delivered = 0
-        failed = 0
-        for giver_id, receiver_id in pairs:
-            giver = by_id[giver_id]
-            receiver = by_id[receiver_id]
             try:
-                await bot.send_message(
-                    giver.tg_id,
-                    f"Твой получатель: <b>{receiver.name}</b>"
-                    f"Приблизительная цена подарка: {money}",
-                    parse_mode="HTML",
+                pairs = draw_pairs([p.id for p in players], avoid=avoid)
+            except DrawInfeasibleError:
+                return DrawResult(False, "infeasible")
+            money = game.money
+
+            by_id = {p.id: p for p in players}
+            messages = [
+                (
+                    by_id[giver_id].tg_id,
+                    f"Твой получатель: <b>{escape(by_id[receiver_id].name)}</b>\n"
+                    f"Приблизительная цена подарка: {escape(money)}",
                 )
-                delivered += 1
-            except Exception:
-                failed += 1
+                for giver_id, receiver_id in pairs
+            ]
+
+            await outbox_repo.clear_messages(game_id)
+            await outbox_repo.add_messages(game_id, messages)
+            await assign_repo.save_assignments(game_id, pairs, replace=True)
+            await game_repo.finish_draw(game_id, game.draw_generation)
+            await game_repo.notify_games_changed([(game_id, game.code)])
+            uow.after_commit(lambda: invalidate_game_info(game_id, game.code))
+
+        return DrawResult(True, "ok", queued=len(messages))
+
+    async def get_mailing_status(self, game_id: int) -> MailingStatus:
+        repo = OutboxRepo(self.session)
+        counts = await repo.count_by_status(game_id)
+        failed = counts.get("failed", 0)
+        failed_players = await repo.list_failed_players(game_id) if failed else []
+        return MailingStatus(
+            sent=counts.get("sent", 0),
+            pending=counts.get("pending", 0) + counts.get("sending", 0),
+            failed=failed,
+            failed_names=[p.name for p in failed_players],
+        )
 
-        return DrawResult(True, "ok", delivered=delivered, failed=failed)
+    async def retry_failed(self, game_id: int) -> int:
+        repo = OutboxRepo(self.session)
+        async with UnitOfWork(self.session):
+            return await repo.requeue_failed(game_id)
 
     async def get_my_receiver(self, game_id: int, tg_id: int) -> MyReceiverResult:
         player_repo = PlayerRepo(self.session)
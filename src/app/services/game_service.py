@@ -4,6 +4,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.app.db.models import Game
 from src.app.db.repos.game_repo import GameRepo
+from src.app.db.uow import UnitOfWork
+from src.app.settings import settings
+from src.app.utils.cache import TTLCache
 from src.app.utils.code import generate_game_code
 from src.app.utils.link import generate_link
 
@@ -17,6 +20,66 @@ class GameInfoDTO:
     participants: int
     money: str
     deep_link: str
+    draw_generation: int = 0
+
+
+@dataclass(frozen=True)
+class GamesPage:
+    role: str
+    items: list[tuple[int, str]]
+    prev_cursor: int | None
+    next_cursor: int | None
+
+
+@dataclass(frozen=True)
+class GameCodeEntry:
+    game_id: int
+    status: str
+    name: str
+
+
+game_info_cache: TTLCache[int, GameInfoDTO] = TTLCache(settings.GAME_CACHE_SIZE, settings.GAME_CACHE_TTL)
+game_code_cache: TTLCache[str, GameCodeEntry] = TTLCache(settings.GAME_CODE_CACHE_SIZE, settings.GAME_CACHE_TTL)
+# отдельный кэш под несуществующие коды, чтобы перебор кодов не вытеснял настоящие игры
+unknown_code_cache: TTLCache[str, bool] = TTLCache(
+    settings.GAME_CODE_NEGATIVE_CACHE_SIZE, settings.GAME_CODE_NEGATIVE_CACHE_TTL
+)
+
+
+def invalidate_game_info(game_id: int, code: str | None = None) -> None:
+    game_info_cache.pop(game_id)
+    if code is not None:
+        game_code_cache.pop(code)
+
+
+def invalidate_from_notify(payload: str) -> None:
+    # payload из GameRepo.notify_games_changed: игра пропала или появилась в другом процессе
+    game_id, _, code = payload.partition(":")
+    invalidate_game_info(int(game_id), code)
+    unknown_code_cache.pop(code)
+
+
+def clear_game_caches() -> None:
+    game_info_cache.clear()
+    game_code_cache.clear()
+    unknown_code_cache.clear()
+
+
+async def lookup_game_code(session: AsyncSession, code: str) -> GameCodeEntry | None:
+    entry = game_code_cache.get(code)
+    if entry is not None:
+        return entry
+    if unknown_code_cache.get(code):
+        return None
+
+    game = await GameRepo(session).get_game_by_code(code)
+    if game is None:
+        unknown_code_cache.set(code, True)
+        return None
+
+    entry = GameCodeEntry(game_id=game.id, status=game.status, name=game.name)
+    game_code_cache.set(code, entry)
+    return entry
 
 
 class GameService:
@@ -27,56 +90,92 @@ class GameService:
         game_repo = GameRepo(self.session)
 
         game_code = generate_game_code(8)
-        game = await game_repo.create_game(game_name, money, game_code, owner_id)
+        async with UnitOfWork(self.session) as uow:
+            game = await game_repo.create_game(game_name, money, game_code, owner_id)
+            await game_repo.notify_games_changed([(game.id, game_code)])
+            uow.after_commit(lambda: unknown_code_cache.pop(game_code))
         return game
 
-    async def get_games_by_role(self, tg_id: int, role: str) -> list[Game]:
+    async def get_games_by_role(
+        self,
+        tg_id: int,
+        role: str,
+        *,
+        before_id: int | None = None,
+        after_id: int | None = None,
+    ) -> GamesPage:
         game_repo = GameRepo(self.session)
-        if role == "owner":
-            return await game_repo.list_games_by_admin(tg_id)
+        size = settings.GAMES_PAGE_SIZE
+        list_games = game_repo.list_games_by_admin if role == "owner" else game_repo.list_games_by_player
+
+        # берём на одну больше, чтобы понять, есть ли ещё страница в ту же сторону
+        rows = await list_games(tg_id, before_id=before_id, after_id=after_id, limit=size + 1)
+        has_more = len(rows) > size
+
+        if after_id is not None:
+            items = rows[-size:]
+            has_newer, has_older = has_more, True
         else:
-            return await game_repo.list_games_by_player(tg_id)
+            items = rows[:size]
+            has_newer, has_older = before_id is not None, has_more
+
+        return GamesPage(
+            role=role,
+            items=items,
+            prev_cursor=items[0][0] if items and has_newer else None,
+            next_cursor=items[-1][0] if items and has_older else None,
+        )
 
     async def get_game_info_by_id(self, game_id: int) -> GameInfoDTO | None:
+        cached = game_info_cache.get(game_id)
+        if cached is not None:
+            return cached
+
         game_repo = GameRepo(self.session)
 
         game = await game_repo.get_game_by_id(game_id)
         if not game:
             return None
 
-        cnt = await game_repo.count_participants(game.id)
         link = generate_link(game.code)
 
-        return GameInfoDTO(
+        dto = GameInfoDTO(
             id=game.id,
             name=game.name,
             code=game.code,
             status=game.status,
-            participants=cnt,
+            participants=game.participant_count,
             money=game.money,
             deep_link=link,
+            draw_generation=game.draw_generation,
         )
+        game_info_cache.set(game_id, dto)
+        return dto
 
     async def money_game(self, game_id: int) -> str:
         repo = GameRepo(self.session)
         return await repo.get_money_by_id(game_id)
 
     async def lock_game(self, game_id: int) -> bool:
-        repo = GameRepo(self.session)
-        game = await repo.get_game_by_id(game_id)
-        if not game:
-            return False
-        await repo.set_game_status(game_id, "locked")
-        return True
+        return await self._set_status(game_id, "locked")
 
     async def open_game(self, game_id: int) -> bool:
+        return await self._set_status(game_id, "open")
+
+    async def _set_status(self, game_id: int, status: str) -> bool:
         repo = GameRepo(self.session)
-        game = await repo.get_game_by_id(game_id)
-        if not game:
-            return False
-        await repo.set_game_status(game_id, "open")
-        return True
+        async with UnitOfWork(self.session) as uow:
+            code = await repo.set_game_status(game_id, status)
+            if code is not None:
+                await repo.notify_games_changed([(game_id, code)])
+            uow.after_commit(lambda: invalidate_game_info(game_id, code))
+        return code is not None
 
     async def drop_game(self, game_id: int) -> bool:
         repo = GameRepo(self.session)
-        return await repo.delete_game(game_id)
+        async with UnitOfWork(self.session) as uow:
+            code = await repo.delete_game(game_id)
+            if code is not None:
+                await repo.notify_games_changed([(game_id, code)])
+            uow.after_commit(lambda: invalidate_game_info(game_id, code))
+        return code is not None
@@ -1,16 +1,27 @@
 from dataclasses import dataclass
+from typing import AsyncIterator
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.app.db.models import Game, Player
+from src.app.db.models import Player
 from src.app.db.repos.game_repo import GameRepo
 from src.app.db.repos.player_repo import PlayerRepo
+from src.app.db.uow import UnitOfWork
+from src.app.services.game_service import GameCodeEntry, invalidate_game_info, lookup_game_code
 
 
 @dataclass(frozen=True)
 class JoinPrecheckResult:
     ok: bool
     reason: str
-    game: Game | None = None
+    game: GameCodeEntry | None = None
+
+
+@dataclass(frozen=True)
+class JoinResult:
+    ok: bool
+    reason: str
+    game_name: str | None = None
 
 
 class PlayerService:
@@ -23,17 +34,16 @@ class PlayerService:
             tg_id: int,
             require_collecting: bool = True,
     ) -> JoinPrecheckResult:
-        game_repo = GameRepo(self.session)
         player_repo = PlayerRepo(self.session)
 
-        game = await game_repo.get_game_by_code(code)
+        game = await lookup_game_code(self.session, code)
         if not game:
             return JoinPrecheckResult(ok=False, reason="not_found", game=None)
 
-        if require_collecting and getattr(game, "status", None) != "open":
+        if require_collecting and game.status != "open":
             return JoinPrecheckResult(ok=False, reason="closed", game=game)
 
-        existing = await player_repo.get_player_by_tg(game.id, tg_id)
+        existing = await player_repo.get_player_by_tg(game.game_id, tg_id)
         if existing:
             return JoinPrecheckResult(ok=False, reason="already_joined", game=game)
 
@@ -45,19 +55,23 @@ class PlayerService:
             tg_id: int,
             name: str,
             username: str = ""
-    ) -> Player:
-        game_repo = GameRepo(self.session)
+    ) -> JoinResult:
         player_repo = PlayerRepo(self.session)
 
-        game = await game_repo.get_game_by_code(code)
-
-        created = await player_repo.add_participant(
-            game_id=game.id,
-            tg_id=tg_id,
-            name=name,
-            username=username or "",
-        )
-        return created
+        # статус и уникальность проверяет сама БД — между прочеком и вставкой могли закрыть игру
+        async with UnitOfWork(self.session) as uow:
+            row = await player_repo.join_by_code(code, tg_id, name, username or "")
+            if row is None:
+                return JoinResult(ok=False, reason="not_found")
+            if row.player_id is not None:
+                await GameRepo(self.session).notify_games_changed([(row.id, code)])
+                uow.after_commit(lambda: invalidate_game_info(row.id))
+                return JoinResult(ok=True, reason="ok", game_name=row.name)
+
+        if row.status != "open":
+            invalidate_game_info(row.id, code)
+            return JoinResult(ok=False, reason="closed", game_name=row.name)
+        return JoinResult(ok=False, reason="already_joined", game_name=row.name)
 
     async def leave_game(self, game_id: int, tg_id: int) -> bool:
         game_repo = GameRepo(self.session)
@@ -69,8 +83,26 @@ class PlayerService:
             return False
 
         player_repo = PlayerRepo(self.session)
-        return await player_repo.remove_participant(game_id, tg_id)
+        async with UnitOfWork(self.session) as uow:
+            ok = await player_repo.remove_participant(game_id, tg_id)
+            if ok:
+                await game_repo.notify_games_changed([(game_id, game.code)])
+            uow.after_commit(lambda: invalidate_game_info(game_id))
+        return ok
 
     async def get_list_participants(self, game_id: int) -> list[Player]:
         repo = PlayerRepo(self.session)
         return await repo.list_participants(game_id)
+
+    async def stream_participants(self, game_id: int, batch_size: int = 500) -> AsyncIterator[tuple[str, str]]:
+        # транзакция закрывается до yield: пока хендлер шлёт сообщения, соединение лежит в пуле
+        repo = PlayerRepo(self.session)
+        after_id = 0
+        while True:
+            async with UnitOfWork(self.session):
+                page = await repo.list_participants_page(game_id, after_id, batch_size)
+            for _, name, username in page:
+                yield name, username
+            if len(page) < batch_size:
+                return
+            after_id = page[-1][0]
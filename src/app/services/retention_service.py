@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.db.repos.archive_repo import ArchiveRepo
+from src.app.db.repos.game_repo import GameRepo
+from src.app.db.uow import UnitOfWork
+from src.app.services.game_service import invalidate_game_info, unknown_code_cache
+
+
+@dataclass(frozen=True)
+class RestoreResult:
+    ok: bool
+    reason: str
+    game_id: int | None = None
+    game_name: str | None = None
+
+
+class RetentionService:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def archive_batch(self, cutoff: datetime, limit: int) -> int:
+        repo = ArchiveRepo(self.session)
+        async with UnitOfWork(self.session) as uow:
+            rows = await repo.archive_batch(cutoff, limit)
+            await GameRepo(self.session).notify_games_changed(rows)
+
+            def drop_cached() -> None:
+                for game_id, code in rows:
+                    invalidate_game_info(game_id, code)
+
+            uow.after_commit(drop_cached)
+        return len(rows)
+
+    async def restore_by_code(self, code: str, owner_id: int | None = None) -> RestoreResult:
+        # owner_id=None — восстановление из консоли, без проверки админа
+        repo = ArchiveRepo(self.session)
+        async with UnitOfWork(self.session) as uow:
+            archived = await repo.get_archived_by_code(code)
+            if archived is None:
+                return RestoreResult(False, "not_found")
+            if owner_id is not None and archived.owner_id != owner_id:
+                return RestoreResult(False, "not_owner")
+            if await GameRepo(self.session).get_game_by_code(code) is not None:
+                return RestoreResult(False, "code_taken")
+
+            await repo.restore_game(archived.id)
+            await GameRepo(self.session).notify_games_changed([(archived.id, code)])
+            uow.after_commit(lambda: unknown_code_cache.pop(code))
+
+        return RestoreResult(True, "ok", game_id=archived.id, game_name=archived.name)
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.db.models import Game
+from src.app.db.repos.game_repo import GameRepo
+from src.app.db.repos.schedule_repo import ScheduleRepo
+from src.app.db.uow import UnitOfWork
+
+JOB_KINDS = ("lock", "draw", "remind")
+# у игры может быть только одно время закрытия и одна жеребьёвка, напоминаний — сколько угодно
+SINGLE_KINDS = ("lock", "draw")
+
+
+@dataclass(frozen=True)
+class ScheduleResult:
+    ok: bool
+    reason: str
+    run_at: datetime | None = None
+    count: int = 0
+
+
+@dataclass(frozen=True)
+class JobInfo:
+    id: int
+    kind: str
+    run_at: datetime
+    status: str
+    text: str | None
+
+
+@dataclass(frozen=True)
+class ScheduleList:
+    ok: bool
+    reason: str
+    game_name: str | None = None
+    jobs: tuple[JobInfo, ...] = ()
+
+
+class ScheduleService:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def _owned_game(self, code: str, owner_id: int) -> tuple[Game | None, str]:
+        game = await GameRepo(self.session).get_game_by_code(code)
+        if game is None:
+            return None, "not_found"
+        if game.owner_id != owner_id:
+            return None, "not_owner"
+        return game, "ok"
+
+    async def schedule_job(
+        self,
+        code: str,
+        owner_id: int,
+        kind: str,
+        run_at: datetime,
+        text: str | None = None,
+    ) -> ScheduleResult:
+        if kind not in JOB_KINDS:
+            return ScheduleResult(False, "bad_kind")
+        if run_at <= datetime.now(timezone.utc):
+            return ScheduleResult(False, "in_past")
+        if kind == "remind" and not text:
+            return ScheduleResult(False, "no_text")
+
+        repo = ScheduleRepo(self.session)
+        async with UnitOfWork(self.session):
+            game, reason = await self._owned_game(code, owner_id)
+            if game is None:
+                return ScheduleResult(False, reason)
+            if kind == "draw" and game.status == "drawn":
+                return ScheduleResult(False, "already_drawn")
+
+            payload: dict = {}
+            if kind == "draw":
+                # то же поколение, что у кнопки: если админ успеет провести жеребьёвку руками, задача станет no-op
+                payload["generation"] = game.draw_generation
+            elif kind == "remind":
+                payload["text"] = text
+
+            if kind in SINGLE_KINDS:
+                await repo.cancel_jobs(game.id, kind)
+            await repo.add_job(game.id, kind, run_at, payload)
+
+        return ScheduleResult(True, "ok", run_at=run_at)
+
+    async def cancel_jobs(self, code: str, owner_id: int, kind: str | None = None) -> ScheduleResult:
+        repo = ScheduleRepo(self.session)
+        async with UnitOfWork(self.session):
+            game, reason = await self._owned_game(code, owner_id)
+            if game is None:
+                return ScheduleResult(False, reason)
+            count = await repo.cancel_jobs(game.id, kind)
+        return ScheduleResult(True, "ok", count=count)
+
+    async def list_jobs(self, code: str, owner_id: int) -> ScheduleList:
+        game, reason = await self._owned_game(code, owner_id)
+        if game is None:
+            return ScheduleList(False, reason)
+
+        jobs = await ScheduleRepo(self.session).list_jobs(game.id)
+        return ScheduleList(
+            True,
+            "ok",
+            game_name=game.name,
+            jobs=tuple(JobInfo(j.id, j.kind, j.run_at, j.status, j.payload.get("text")) for j in jobs),
+        )
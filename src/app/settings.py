@@ -13,7 +13,76 @@ class Settings(BaseSettings):
     DB_PORT: int
     DB_NAME: str
 
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PGBOUNCER: bool = False
+    DB_SLOW_QUERY_MS: float = 200.0
+    DB_QUERY_BUDGET_STRICT: bool = False
+
     TOKEN: str
+    TELEGRAM_API_URL: str = ""
+
+    BOT_MODE: str = "polling"
+    WEBHOOK_URL: str = ""
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: str = ""
+    WEBAPP_HOST: str = "0.0.0.0"
+    WEBAPP_PORT: int = 8080
+    BOT_WORKERS: int = 1
+    BOT_WORKER_CONCURRENCY: int = 100
+
+    BROADCAST_CONCURRENCY: int = 10
+    BROADCAST_RATE: float = 25.0
+    BROADCAST_CHAT_RATE: float = 1.0
+    BROADCAST_MAX_RETRIES: int = 3
+
+    GAMES_PAGE_SIZE: int = 8
+
+    GAME_CACHE_SIZE: int = 10_000
+    GAME_CACHE_TTL: float = 30.0
+    GAME_CODE_CACHE_SIZE: int = 10_000
+    GAME_CODE_NEGATIVE_CACHE_SIZE: int = 100_000
+    GAME_CODE_NEGATIVE_CACHE_TTL: float = 60.0
+    GAME_CACHE_LISTEN: bool = True
+    GAME_CACHE_LISTEN_RETRY: float = 5.0
+
+    FSM_STORAGE: str = "memory"
+    FSM_TTL_SECONDS: int = 7 * 24 * 3600
+    FSM_CACHE_SIZE: int = 0
+    FSM_CACHE_TTL: float = 5.0
+
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_LEASE_SECONDS: float = 120.0
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_IDLE_INTERVAL: float = 30.0
+
+    SCHEDULER_BATCH_SIZE: int = 50
+    SCHEDULER_LEASE_SECONDS: float = 300.0
+    SCHEDULER_MAX_ATTEMPTS: int = 5
+    SCHEDULER_IDLE_INTERVAL: float = 60.0
+    SCHEDULER_PREFETCH: int = 100
+    SCHEDULE_TIMEZONE: str = "Europe/Moscow"
+
+    RETENTION_DAYS: int = 180
+    RETENTION_BATCH_SIZE: int = 200
+    RETENTION_BATCH_PAUSE: float = 0.5
+
+    RENDER_CACHE_SIZE: int = 10_000
+    RENDER_CACHE_TTL: float = 600.0
+    RENDER_KEYBOARD_CACHE_SIZE: int = 4096
+
+    THROTTLE_RATE: float = 2.0
+    THROTTLE_BURST: float = 5.0
+    THROTTLE_DEBOUNCE: float = 1.0
+    THROTTLE_CACHE_SIZE: int = 10_000
+
+    METRICS_ENABLED: bool = False
+    METRICS_HOST: str = "0.0.0.0"
+    METRICS_PORT: int = 9100
 
     @property
     def DB_URL(self) -> str:
@@ -0,0 +1,167 @@
+import random
+from collections import deque
+from typing import Iterable, Sequence
+
+Pair = tuple[int, int]
+
+REPAIR_TRIES = 64
+
+
+class DrawInfeasibleError(ValueError):
+    pass
+
+
+def draw_pairs(
+    players: Sequence[int],
+    *,
+    exclusions: Iterable[Pair] = (),
+    avoid: Iterable[Pair] = (),
+    rng: random.Random | None = None,
+) -> list[Pair]:
+    # exclusions — жёсткие запреты в обе стороны (пары, семьи);
+    # avoid — даритель→получатель прошлого года, их обходим только если это вообще возможно
+    if len(players) < 3:
+        raise ValueError('Минимум 3 надо')
+
+    rng = rng or random.Random()
+
+    hard: dict[int, set[int]] = {}
+    for a, b in exclusions:
+        hard.setdefault(a, set()).add(b)
+        hard.setdefault(b, set()).add(a)
+
+    soft = {giver: set(receivers) for giver, receivers in hard.items()}
+    for giver, receiver in avoid:
+        soft.setdefault(giver, set()).add(receiver)
+
+    try:
+        return _solve(players, soft, rng)
+    except DrawInfeasibleError:
+        if soft == hard:
+            raise
+    return _solve(players, hard, rng)
+
+
+def _solve(players: Sequence[int], forbidden: dict[int, set[int]], rng: random.Random) -> list[Pair]:
+    order = list(players)
+    rng.shuffle(order)
+    if not forbidden:
+        return _cycle(order)
+
+    pairs = _repair_cycle(order, forbidden, rng)
+    if pairs is not None:
+        return pairs
+    return _match(order, forbidden, rng)
+
+
+def _cycle(order: list[int]) -> list[Pair]:
+    n = len(order)
+    return [(order[i], order[(i + 1) % n]) for i in range(n)]
+
+
+def _repair_cycle(order: list[int], forbidden: dict[int, set[int]], rng: random.Random) -> list[Pair] | None:
+    # один общий круг; запрещённые рёбра чиним случайными перестановками соседей — O(1) на ребро
+    n = len(order)
+    empty: set[int] = set()
+
+    def edge_ok(i: int) -> bool:
+        return order[(i + 1) % n] not in forbidden.get(order[i], empty)
+
+    def around_ok(*positions: int) -> bool:
+        return all(edge_ok((p - 1) % n) and edge_ok(p) for p in positions)
+
+    for i in [i for i in range(n) if not edge_ok(i)]:
+        if edge_ok(i):
+            continue
+        k = (i + 1) % n
+        for _ in range(REPAIR_TRIES):
+            j = rng.randrange(n)
+            if j == k:
+                continue
+            order[k], order[j] = order[j], order[k]
+            if around_ok(k, j):
+                break
+            order[k], order[j] = order[j], order[k]
+        else:
+            return None
+
+    return _cycle(order)
+
+
+def _match(order: list[int], forbidden: dict[int, set[int]], rng: random.Random) -> list[Pair]:
+    # точный поиск паросочетания: либо находит распределение, либо доказывает, что его нет.
+    # списки кандидатов не строим — разрешены все, кроме запретов, поэтому одно дополнение стоит
+    # O(n + сумма запретов), а не O(n²)
+    empty: set[int] = set()
+
+    def allowed(giver: int, receiver: int) -> bool:
+        return receiver != giver and receiver not in forbidden.get(giver, empty)
+
+    free = list(order)
+    rng.shuffle(free)
+    free_pos = {r: i for i, r in enumerate(free)}
+
+    def take(receiver: int) -> None:
+        i = free_pos.pop(receiver)
+        last = free.pop()
+        if last != receiver:
+            free[i] = last
+            free_pos[last] = i
+
+    receiver_of: dict[int, int] = {}
+    giver_of: dict[int, int] = {}
+    # жадно: несколько случайных свободных получателей; кто не нашёл пару — дополняется ниже
+    for giver in order:
+        if len(free) <= REPAIR_TRIES:
+            candidates: Iterable[int] = free
+        else:
+            candidates = (free[rng.randrange(len(free))] for _ in range(REPAIR_TRIES))
+        pick = next((r for r in candidates if allowed(giver, r)), None)
+        if pick is not None:
+            take(pick)
+            receiver_of[giver] = pick
+            giver_of[pick] = giver
+
+    for start in order:
+        if start in receiver_of:
+            continue
+
+        # BFS по чередующимся путям; каждый получатель посещается один раз, а перебор unvisited
+        # у дарителя стоит (сколько забрал + сколько ему запрещено)
+        came_from: dict[int, int] = {}
+        unvisited = set(order)
+        queue = deque([start])
+        found = None
+        while queue and found is None:
+            giver = queue.popleft()
+            found = next((r for r in free if allowed(giver, r)), None)
+            if found is not None:
+                came_from[found] = giver
+                break
+            # unvisited пересобираем, а не чистим discard'ом: set не сжимается и обход пустеющего
+            # множества стоил бы O(исходного размера) на каждого дарителя
+            banned = forbidden.get(giver, empty)
+            rest: set[int] = set()
+            for receiver in unvisited:
+                if receiver == giver or receiver in banned:
+                    rest.add(receiver)
+                    continue
+                came_from[receiver] = giver
+                queue.append(giver_of[receiver])
+            unvisited = rest
+
+        if found is None:
+            raise DrawInfeasibleError('С такими ограничениями распределить нельзя')
+
+        take(found)
+        receiver = found
+        while True:
+            giver = came_from[receiver]
+            previous = receiver_of.get(giver)
+            receiver_of[giver] = receiver
+            giver_of[receiver] = giver
+            if giver == start:
+                break
+            receiver = previous
+
+    return [(giver, receiver_of[giver]) for giver in order]
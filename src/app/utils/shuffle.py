@@ -1,11 +0,0 @@
-import random
-from typing import List
-
-
-def shuffle_list(players:  List[int]) -> List[tuple[int, int]]:
-    if len(players) < 3:
-        raise ValueError('Минимум 3 надо')
-
-    random.shuffle(players)
-
-    return [(players[i], players[(i + 1) % len(players)]) for i in range(len(players))]
\ No newline at end of file